@@ -0,0 +1,331 @@
+"""
+Shared helpers of the MCOW benchmark suites: step measurement (wall time, peak RSS, allocations),
+optional cProfile / flamegraph output and JSON reports that can be compared amongst runs.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import tracemalloc
+import cProfile
+from collections import Counter
+
+try:
+    import resource
+except ImportError:     # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+
+def get_peak_rss_mb():
+    """
+    Peak resident set size of the current process, in MB (None if it cannot be measured).
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024     # Bytes on macOS, KB on Linux
+
+
+def get_environment():
+    """
+    Versions and machine data stored alongside the results, so that runs on different setups are not mixed up.
+    """
+    environment = {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor(),
+                   "cpu_count": os.cpu_count()}
+
+    for module_name in ["rdflib", "numpy", "torch"]:
+        module = sys.modules.get(module_name)
+        environment[module_name] = getattr(module, "__version__", None) if module is not None else None
+
+    try:
+        environment["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                               timeout=10).stdout.strip() or None
+    except Exception:
+        environment["commit"] = None
+
+    return environment
+
+
+class StackSampler:
+    """
+    Samples the stack of a thread every interval seconds and accumulates it in the "collapsed stacks"
+    format (one "frame;frame;frame count" line per stack) read by flamegraph.pl, inferno or speedscope.
+    """
+
+    def __init__(self, interval=0.001, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = Counter()
+        self.running = False
+        self.sampler = None
+
+    def __sample(self):
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = list()
+
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+            time.sleep(self.interval)
+
+    def start(self):
+        self.running = True
+        self.sampler = threading.Thread(target=self.__sample, name="benchmark-stack-sampler", daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.running = False
+        self.sampler.join()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StepRecorder:
+    """
+    Measures named steps of a benchmark, either as context managers ("with recorder.step(name):")
+    or by wrapping existing functions ("recorder.wrap(owner, attribute, name)").
+
+    For each step it records the wall time, the peak RSS of the process after it (and how much it grew),
+    the net amount of allocated memory blocks and, if enabled, the peak memory traced by tracemalloc.
+    Optionally, each step is profiled with cProfile (.pstats) and/or sampled into a collapsed-stacks file.
+    """
+
+    def __init__(self, trace_memory=False, profile_dir=None, flamegraph_dir=None):
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.flamegraph_dir = flamegraph_dir
+        self.results = dict()
+        self.active_steps = list()     # Steps being measured, from the outermost to the innermost one
+
+        for directory in [profile_dir, flamegraph_dir]:
+            if directory is not None:
+                os.makedirs(directory, exist_ok=True)
+
+        if trace_memory:
+            tracemalloc.start()
+
+    def step(self, name, suppress_errors=True):
+        return _Step(self, name, suppress_errors)
+
+    def wrap(self, owner, attribute, name):
+        """
+        Replaces owner.attribute (a function, method or class) by a wrapper that measures its first call as a step.
+        """
+        original = getattr(owner, attribute)
+        recorder = self
+
+        def measured(*args, **kwargs):
+            if name in recorder.results:
+                return original(*args, **kwargs)
+
+            with recorder.step(name, suppress_errors=False):    # The caller still gets the exception
+                return original(*args, **kwargs)
+
+        if isinstance(owner, type) and isinstance(original, type):
+            measured = staticmethod(measured)   # Nested classes must not be bound to the instance that builds them
+
+        setattr(owner, attribute, measured)
+
+        return original
+
+    def record(self, name, result):
+        self.results[name] = result
+
+    def file_name(self, name):
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+
+class _Step:
+    """
+    Context manager that measures a single step of a StepRecorder. Errors are stored in the results and,
+    if suppress_errors is True, not raised, so that a failing step does not hide the measurements of the others.
+    """
+
+    def __init__(self, recorder, name, suppress_errors=True):
+        self.recorder = recorder
+        self.name = name
+        self.suppress_errors = suppress_errors
+        self.profiler = None
+        self.sampler = None
+        self.nested_traced_peak = 0     # tracemalloc has a single peak, which nested steps reset
+
+    def __enter__(self):
+        recorder = self.recorder
+        nested = len(recorder.active_steps) > 0      # cProfile and the sampler are only attached to the outermost step
+        if recorder.trace_memory:
+            if nested:      # Keep the peak reached by the parent step so far, before resetting it
+                parent = recorder.active_steps[-1]
+                parent.nested_traced_peak = max(parent.nested_traced_peak, tracemalloc.get_traced_memory()[1])
+
+            tracemalloc.reset_peak()
+
+        recorder.active_steps.append(self)
+
+        if recorder.profile_dir is not None and not nested:
+            self.profiler = cProfile.Profile()
+
+        if recorder.flamegraph_dir is not None and not nested:
+            self.sampler = StackSampler()
+            self.sampler.start()
+
+        self.rss_before = get_peak_rss_mb()
+        self.blocks_before = sys.getallocatedblocks()
+
+        if self.profiler is not None:
+            self.profiler.enable()
+
+        self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        wall_time = time.perf_counter() - self.start
+
+        if self.profiler is not None:
+            self.profiler.disable()
+
+        recorder = self.recorder
+        recorder.active_steps.pop()
+
+        result = {"wall_time_s": wall_time, "allocated_blocks_delta": sys.getallocatedblocks() - self.blocks_before}
+
+        rss_after = get_peak_rss_mb()
+        if rss_after is not None:
+            result["peak_rss_mb"] = rss_after
+            result["peak_rss_growth_mb"] = rss_after - self.rss_before
+
+        if recorder.trace_memory:
+            traced_peak = max(tracemalloc.get_traced_memory()[1], self.nested_traced_peak)
+            result["traced_peak_mb"] = traced_peak / (1024 * 1024)
+
+            if recorder.active_steps:
+                parent = recorder.active_steps[-1]
+                parent.nested_traced_peak = max(parent.nested_traced_peak, traced_peak)
+
+        if self.profiler is not None:
+            stats_path = os.path.join(recorder.profile_dir, recorder.file_name(self.name) + ".pstats")
+            self.profiler.dump_stats(stats_path)
+            result["pstats"] = stats_path
+
+        if self.sampler is not None:
+            self.sampler.stop()
+            stacks_path = os.path.join(recorder.flamegraph_dir, recorder.file_name(self.name) + ".collapsed")
+            self.sampler.write(stacks_path)
+            result["collapsed_stacks"] = stacks_path
+
+        if exc_type is not None:
+            result["error"] = "".join(traceback.format_exception_only(exc_type, exc_value)).strip()
+
+        recorder.record(self.name, result)
+
+        return self.suppress_errors and exc_type is not None and issubclass(exc_type, Exception)
+
+
+def write_report(report, output_path=None):
+    """
+    Writes a JSON report to output_path, or to the standard output if it is None.
+    """
+    text = json.dumps(report, indent=2)     # Steps keep their execution order
+
+    if output_path is None:
+        print(text)
+    else:
+        with open(output_path, "w") as f:
+            f.write(text + "\n")
+        print(f"Benchmark results written to {output_path}")
+
+
+def compare_reports(baseline, current, metric="wall_time_s", tolerance=0.2, min_delta=0.005):
+    """
+    Compares the steps of two reports and returns the regressions: steps whose metric grew more than
+    tolerance (relative) and min_delta (absolute), or that failed in the current run but not in the baseline.
+    """
+    regressions = list()
+    baseline_steps = baseline.get("steps", {})
+
+    for name, result in current.get("steps", {}).items():
+        previous = baseline_steps.get(name)
+
+        if previous is None:
+            continue
+
+        if "error" in result and "error" not in previous:
+            regressions.append({"step": name, "error": result["error"]})
+            continue
+
+        if result.get(metric) is None or previous.get(metric) is None:
+            continue
+
+        baseline_value = _summary_value(previous[metric])
+        current_value = _summary_value(result[metric])
+
+        delta = current_value - baseline_value
+        if delta > min_delta and delta > tolerance * abs(baseline_value):
+            regressions.append({"step": name, "metric": metric, "baseline": baseline_value, "current": current_value})
+
+    return regressions
+
+
+def _summary_value(value):
+    return value["median"] if isinstance(value, dict) else value    # Aggregated reports store {"min", "median", "max"}
+
+
+def run_in_subprocesses(module, arguments, repeat):
+    """
+    Runs a benchmark module "repeat" times, each one in a fresh interpreter (so that every run is a real
+    cold start), and returns the list of their JSON reports.
+    """
+    reports = list()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for run in range(repeat):
+            run_output = os.path.join(tmp_dir, f"run_{run}.json")
+            completed = subprocess.run([sys.executable, "-m", module, "--single-run", "--output", run_output] + arguments,
+                                       capture_output=True, text=True)
+
+            if completed.returncode != 0:
+                raise Exception(f"Benchmark run failed:\n{completed.stderr}")
+
+            with open(run_output) as f:
+                reports.append(json.load(f))
+
+    return reports
+
+
+def aggregate_reports(reports):
+    """
+    Merges several reports of the same benchmark: every numeric metric of each step is replaced by
+    {"min", "median", "max"} over the runs.
+    """
+    aggregated = {"environment": reports[0]["environment"], "runs": len(reports), "steps": dict()}
+
+    for name in reports[0]["steps"]:
+        runs = [report["steps"][name] for report in reports if name in report["steps"]]
+        step = dict()
+
+        for metric, value in runs[0].items():
+            if isinstance(value, (int, float)):
+                values = sorted(run[metric] for run in runs if metric in run)
+                step[metric] = {"min": values[0], "median": statistics.median(values), "max": values[-1]}
+            else:
+                step[metric] = value
+
+        aggregated["steps"][name] = step
+
+    return aggregated
@@ -0,0 +1,264 @@
+"""
+Steady-state latency benchmark of the MCOW analyser queries.
+
+Runs a fixed (seeded) workload of every public analyser query and reports the p50/p95/p99 latencies of each
+one with a cold cache (the results cache is cleared before every call) and with a warm cache. The results of
+every call are checked against a golden output file, so that optimisations can be shown to preserve the
+behaviour of the analyser. The committed golden output was computed by the original analyser (commit 5ea72ac)
+over these same workloads, with the trained embedding model loaded.
+
+Usage (from the project root):
+
+    python -m benchmarks.queries --output queries.json
+    python -m benchmarks.queries --write-golden        # Regenerates benchmarks/golden/queries.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+from rdflib import Literal
+
+from benchmarks import common
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_golden_path = os.path.join(project_root, "benchmarks", "golden", "queries.json")
+
+# Relative tolerance of the float results of each workload (the embeddings are float32, so their
+# similarities only agree up to its precision when they are computed in a different order)
+workload_tolerances = {"calculate_countries_similarity": 1e-6}
+default_tolerance = 1e-9
+
+
+def build_workloads(analyser, seed=0, countries_sample=10, pairs_sample=25, criteria_sample=5):
+    """
+    Returns the benchmark workloads: {workload name: [(call id, callable), ...]}, always the same ones for the same seed.
+    """
+    rng = random.Random(seed)
+    countries = sorted(analyser.get_countries_dict().values())
+    attributes = list(analyser.get_numerical_attributes_list())
+    sampled_countries = rng.sample(countries, min(countries_sample, len(countries)))
+    pairs = [tuple(rng.sample(countries, 2)) for _ in range(pairs_sample)]
+
+    workloads = dict()
+
+    workloads["anaylse_country_values"] = [
+        (f"{country}/{attribute}/{mode}", lambda country=country, attribute=attribute, mode=mode: analyser.anaylse_country_values(country, attribute, mode))
+        for country in sampled_countries for attribute in attributes for mode in ["I", "D"]]
+
+    workloads["analyse_graph_values"] = [
+        (f"{attribute}/{mode}", lambda attribute=attribute, mode=mode: analyser.analyse_graph_values(attribute, mode))
+        for attribute in attributes for mode in ["I", "D"]]
+
+    multi_calls = list()
+    for criteria_count in range(1, 7):
+        for _ in range(criteria_sample):
+            criteria = {attribute: rng.choice(["I", "D"]) for attribute in rng.sample(attributes, criteria_count)}
+            call_id = ",".join(f"{attribute}:{mode}" for attribute, mode in criteria.items())
+            multi_calls.append((call_id, lambda criteria=criteria: analyser.multi_analyse_graph_values(dict(criteria))))
+    workloads["multi_analyse_graph_values"] = multi_calls
+
+    workloads["getAttributesSimilarity"] = [
+        (f"{country_one}/{country_two}/{mode}", lambda country_one=country_one, country_two=country_two, mode=mode:
+            analyser.getAttributesSimilarity(country_one, country_two, mode))
+        for country_one, country_two in pairs for mode in ["d", "e", "s", "t"]]
+
+    workloads["getDAFOAnalysis"] = [(country, lambda country=country: analyser.getDAFOAnalysis(country)) for country in countries]
+
+    workloads["getTemporalEntityData"] = [(country, lambda country=country: analyser.getTemporalEntityData(country))
+                                          for country in sampled_countries]
+
+    similarity_groups = [rng.sample(countries, rng.randint(2, 6)) for _ in range(criteria_sample)]
+    workloads["calculate_countries_similarity"] = [
+        (",".join(group), lambda group=group: analyser.calculate_countries_similarity(list(group))) for group in similarity_groups]
+
+    return workloads
+
+
+def to_json_value(value):
+    """
+    Turns a query result into plain JSON values (tuples, sets and arrays into lists, numpy scalars and
+    RDF literals into numbers or strings).
+    """
+    if isinstance(value, Literal):
+        python_value = value.toPython()
+        return str(value) if isinstance(python_value, Literal) else to_json_value(python_value)
+
+    if isinstance(value, Decimal):
+        return float(value)
+
+    if isinstance(value, dict):
+        return {str(k): to_json_value(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(v) for v in value]
+
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_json_value(v) for v in value)
+
+    if isinstance(value, np.ndarray):
+        return to_json_value(value.tolist())
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+
+    return value
+
+
+def same_value(expected, got, rel_tol=1e-9, abs_tol=1e-12):
+    """
+    Compares two JSON values, allowing a small tolerance on floats.
+    """
+    if isinstance(expected, dict) and isinstance(got, dict):
+        return expected.keys() == got.keys() and all(same_value(expected[k], got[k], rel_tol, abs_tol) for k in expected)
+
+    if isinstance(expected, list) and isinstance(got, list):
+        return len(expected) == len(got) and all(same_value(e, g, rel_tol, abs_tol) for e, g in zip(expected, got))
+
+    if isinstance(expected, (int, float)) and isinstance(got, (int, float)) and not isinstance(expected, bool):
+        return math.isclose(expected, got, rel_tol=rel_tol, abs_tol=abs_tol)
+
+    return expected == got
+
+
+def summarise_latencies(latencies):
+    latencies = np.array(latencies) * 1000
+    return {"count": len(latencies), "mean_ms": float(latencies.mean()), "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)), "p99_ms": float(np.percentile(latencies, 99)), "max_ms": float(latencies.max())}
+
+
+def run_call(call):
+    """
+    Runs a call silently (the analyser prints its results), returning its JSON result and its latency in seconds.
+    Errors are returned as results too, so that a failing query does not stop the benchmark.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        try:
+            result = to_json_value(call())
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        latency = time.perf_counter() - start
+
+    return result, latency
+
+
+def run_query_benchmark(analyser, workloads, golden, warm_repeats=3):
+    """
+    Runs every workload with a cold and a warm cache and checks its results against the golden ones.
+
+    Returns the report and the results of every call ({workload: {call id: result}}).
+    """
+    report = dict()
+    results = dict()
+
+    for workload, calls in workloads.items():
+        cold_latencies = list()
+        warm_latencies = list()
+        workload_results = dict()
+
+        for call_id, call in calls:     # Cold cache: every call starts from an empty results cache
+            analyser.cache.invalidate()
+            workload_results[call_id], latency = run_call(call)
+            cold_latencies.append(latency)
+
+        for _ in range(warm_repeats):   # Warm cache: the calls above left their results cached
+            for call_id, call in calls:
+                warm_latencies.append(run_call(call)[1])
+
+        results[workload] = workload_results
+        report[workload] = {"cold": summarise_latencies(cold_latencies), "warm": summarise_latencies(warm_latencies),
+                            "errors": sum(1 for result in workload_results.values() if isinstance(result, dict) and "error" in result)}
+
+        if golden is not None:
+            report[workload]["golden"] = check_golden(golden.get(workload), workload_results,
+                                                      workload_tolerances.get(workload, default_tolerance))
+
+        print(f"{workload}: cold p50 {report[workload]['cold']['p50_ms']:.3f} ms, warm p50 {report[workload]['warm']['p50_ms']:.3f} ms",
+              file=sys.stderr)
+
+    return report, results
+
+
+def check_golden(expected_results, workload_results, rel_tol=default_tolerance):
+    """
+    Compares the results of a workload with the golden ones. Calls that failed (e.g. missing optional
+    dependencies) or that are not in the golden file are counted apart, instead of as mismatches.
+    """
+    if expected_results is None:
+        return {"status": "missing"}
+
+    mismatches = list()
+    skipped = 0
+
+    for call_id, result in workload_results.items():
+        if call_id not in expected_results or (isinstance(result, dict) and "error" in result):
+            skipped += 1
+        elif not same_value(expected_results[call_id], result, rel_tol=rel_tol, abs_tol=rel_tol):
+            mismatches.append(call_id)
+
+    return {"status": "mismatch" if mismatches else "match", "checked": len(workload_results) - skipped,
+            "skipped": skipped, "mismatches": mismatches[:20]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCOW steady-state query latency benchmark.")
+    parser.add_argument("--folder", default="./impl/data/")
+    parser.add_argument("--filename", default="country_details_ontology_mejorada.ttl")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm-repeats", type=int, default=3, help="Times each call is repeated with a warm cache.")
+    parser.add_argument("--golden", default=default_golden_path, help="Golden output file the results are checked against.")
+    parser.add_argument("--write-golden", action="store_true", help="Write the results as the new golden output instead of checking them.")
+    parser.add_argument("--output", default=None, help="JSON output file (standard output by default).")
+    args = parser.parse_args()
+
+    for option in ["golden", "output"]:     # Relative to the current directory, before moving to the project root
+        if getattr(args, option) is not None:
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+
+    os.chdir(project_root)      # The analyser reads its model with paths relative to the project root
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+    from impl import sbc_tools as sbc
+    from impl import mcow_analyser
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyser = mcow_analyser.MCOWAnalyser(sbc.load(filename=args.filename, folder=args.folder))
+
+    golden = None
+    if not args.write_golden and os.path.exists(args.golden):
+        with open(args.golden) as f:
+            golden = json.load(f)["results"]
+
+    workloads = build_workloads(analyser, seed=args.seed)
+    workload_report, results = run_query_benchmark(analyser, workloads, golden, args.warm_repeats)
+
+    if args.write_golden:   # Failed calls are left out, so that they are not taken as the expected behaviour
+        golden_results = {workload: {call_id: result for call_id, result in workload_results.items()
+                                     if not (isinstance(result, dict) and "error" in result)}
+                          for workload, workload_results in results.items()}
+        os.makedirs(os.path.dirname(args.golden), exist_ok=True)
+        with open(args.golden, "w") as f:
+            json.dump({"seed": args.seed, "results": golden_results}, f, separators=(",", ":"))
+        print(f"Golden output written to {args.golden}", file=sys.stderr)
+
+    common.write_report({"benchmark": "queries", "environment": common.get_environment(), "seed": args.seed,
+                         "warm_repeats": args.warm_repeats, "workloads": workload_report}, args.output)
+
+    if any(workload.get("golden", {}).get("status") == "mismatch" for workload in workload_report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
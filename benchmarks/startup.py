@@ -0,0 +1,176 @@
+"""
+Cold-start benchmark of the MCOW application.
+
+Times, as separate steps: the imports, "sbc_tools.load" (parsing the ontology and reading its snapshot), each
+MCOWAnalyser init helper, the embeddings loading ("torch.load" included) and the first call of each public
+analyser method. Each step reports its wall time, peak RSS and allocations; the results are written as JSON.
+
+Usage (from the project root):
+
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --repeat 5 --output startup.json      # Fresh interpreter per run, min/median/max
+    python -m benchmarks.startup --profile profiles/ --flamegraph profiles/
+    python -m benchmarks.startup --compare startup.json               # Exit code 1 if any step regressed
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+
+from benchmarks import common
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_startup_benchmark(args):
+    """
+    Runs every step once, in the current interpreter, and returns the report.
+    """
+    recorder = common.StepRecorder(trace_memory=args.trace_memory, profile_dir=args.profile, flamegraph_dir=args.flamegraph)
+
+    with recorder.step("import rdflib"):
+        import rdflib
+
+    with recorder.step("import impl.mcow_analyser"):
+        from impl import sbc_tools as sbc
+        from impl import mcow_analyser
+
+    with recorder.step("sbc_tools.load (parse)"):
+        graph = sbc.load(filename=args.filename, folder=args.folder, use_snapshot=False)
+
+    if not args.no_snapshot:
+        snapshot_existed = os.path.exists(os.path.join(args.folder, args.filename) + sbc.snapshot_suffix)
+
+        with recorder.step("sbc_tools.load (snapshot)"):
+            graph = sbc.load(filename=args.filename, folder=args.folder)
+
+        recorder.results["sbc_tools.load (snapshot)"]["snapshot_existed"] = snapshot_existed
+
+    analyser_class = mcow_analyser.MCOWAnalyser
+    recorder.wrap(analyser_class, "_MCOWAnalyser__init_ontology_indexes", "MCOWAnalyser.__init_ontology_indexes")
+    recorder.wrap(analyser_class, "TemporalSeriesStore", "MCOWAnalyser.TemporalSeriesStore")
+    recorder.wrap(analyser_class, "LocalSemanticSimilarityCalculator", "MCOWAnalyser.LocalSemanticSimilarityCalculator")
+    recorder.wrap(analyser_class, "PairwiseSimilarityTable", "MCOWAnalyser.PairwiseSimilarityTable")
+
+    file_path = os.path.abspath(os.path.join(args.folder, args.filename))
+    table_arguments = dict()
+    if args.similarity_table:     # Same setup as "get_shared_analyser"
+        table_arguments = {"similarity_table_path": file_path + mcow_analyser.similarity_table_suffix,
+                           "source_hash": sbc.get_file_hash(file_path)}
+
+    with recorder.step("MCOWAnalyser.__init__", suppress_errors=False):
+        analyser = analyser_class(graph, **table_arguments)
+
+    if importlib.util.find_spec("torch") is not None:
+        with recorder.step("import torch"):
+            import torch
+
+        recorder.wrap(torch, "load", "torch.load")
+
+    with recorder.step("embeddings (first use)"):
+        analyser.warm_up_embeddings(background=False)
+
+    country = args.country
+    other_country = args.other_country
+    attribute = args.attribute or analyser.get_numerical_attributes_list()[0]
+
+    first_calls = [
+        ("anaylse_country_values", lambda: analyser.anaylse_country_values(country, attribute, "I")),
+        ("analyse_graph_values", lambda: analyser.analyse_graph_values(attribute, "I")),
+        ("multi_analyse_graph_values", lambda: analyser.multi_analyse_graph_values({attribute: "I"})),
+        ("getDAFOAnalysis", lambda: analyser.getDAFOAnalysis(country)),
+        ("getTemporalEntityData", lambda: analyser.getTemporalEntityData(country)),
+        ("getAttributesSimilarity (d)", lambda: analyser.getAttributesSimilarity(country, other_country, "d")),
+        ("getAttributesSimilarity (e)", lambda: analyser.getAttributesSimilarity(country, other_country, "e")),
+        ("getAttributesSimilarity (s)", lambda: analyser.getAttributesSimilarity(country, other_country, "s")),
+        ("getAttributesSimilarity (t)", lambda: analyser.getAttributesSimilarity(country, other_country, "t")),
+        ("calculate_countries_similarity", lambda: analyser.calculate_countries_similarity([country, other_country])),
+        ("encontrar_paises_similares", lambda: analyser.encontrar_paises_similares(country, 5)),
+        ("getMostSimilarCountries (d)", lambda: analyser.getMostSimilarCountries(country, "d")),
+    ]
+
+    if args.similarity_table:
+        first_calls.append(("getMostSimilarCountries (t)", lambda: analyser.getMostSimilarCountries(country, "t")))
+
+    for name, call in first_calls:
+        with recorder.step(name + " (first call)"):
+            call()
+
+    return {"benchmark": "startup", "environment": common.get_environment(), "triples": len(graph),
+            "arguments": {"folder": args.folder, "filename": args.filename, "country": country, "other_country": other_country,
+                          "attribute": attribute, "similarity_table": args.similarity_table, "trace_memory": args.trace_memory},
+            "steps": recorder.results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCOW cold-start benchmark.")
+    parser.add_argument("--folder", default="./impl/data/")
+    parser.add_argument("--filename", default="country_details_ontology_mejorada.ttl")
+    parser.add_argument("--country", default="Q29", help="Wikidata code of the country used by the first calls (default: Spain).")
+    parser.add_argument("--other-country", default="Q45", help="Second country of the pairwise calls (default: Portugal).")
+    parser.add_argument("--attribute", default=None, help="Attribute of the tendency calls (default: the first numerical one).")
+    parser.add_argument("--similarity-table", action="store_true", help="Use the on-disk pairwise similarity table, as the application does.")
+    parser.add_argument("--no-snapshot", action="store_true", help="Do not time the load from the graph snapshot.")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report the peak memory traced by tracemalloc (slower).")
+    parser.add_argument("--profile", default=None, metavar="DIR", help="Write a cProfile .pstats file per step into DIR.")
+    parser.add_argument("--flamegraph", default=None, metavar="DIR", help="Write a collapsed-stacks file per step into DIR.")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs, each one in a fresh interpreter.")
+    parser.add_argument("--output", default=None, help="JSON output file (standard output by default).")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="JSON report to compare the results with.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative wall time growth considered a regression.")
+    parser.add_argument("--single-run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    for option in ["output", "compare", "profile", "flamegraph"]:     # Relative to the current directory, before moving to the project root
+        if getattr(args, option) is not None:
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+
+    os.chdir(project_root)      # The analyser reads its model with paths relative to the project root
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+    if args.repeat > 1 and not args.single_run:
+        forwarded = [argument for argument in sys.argv[1:] if argument != "--single-run"]
+        forwarded = _without_options(forwarded, ["--repeat", "--output", "--compare", "--tolerance", "--profile", "--flamegraph"])
+        for option in ["profile", "flamegraph"]:
+            if getattr(args, option) is not None:
+                forwarded += ["--" + option, getattr(args, option)]
+        report = common.aggregate_reports(common.run_in_subprocesses("benchmarks.startup", forwarded, args.repeat))
+        report["benchmark"] = "startup"
+    else:
+        report = run_startup_benchmark(args)
+
+    common.write_report(report, args.output)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            regressions = common.compare_reports(json.load(f), report, tolerance=args.tolerance)
+
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+
+        if regressions:
+            sys.exit(1)
+
+
+def _without_options(arguments, options):
+    """
+    Removes the given options (and their values) from a list of command line arguments.
+    """
+    result = list()
+    skip_next = False
+
+    for argument in arguments:
+        if skip_next:
+            skip_next = False
+        elif argument in options:
+            skip_next = True
+        elif argument.split("=")[0] not in options:
+            result.append(argument)
+
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,141 +1,752 @@
 from impl import sbc_tools as sbc
 import rdflib
-from rdflib import Graph, Namespace
+from rdflib import Graph, Namespace, Literal, URIRef, RDF, RDFS
 import numpy as np
 from typing import List, Tuple, Dict, Optional
-import torch
-from sklearn.metrics.pairwise import cosine_similarity
 import os
+import threading
+import json
+import time
 import re
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from impl.results_cache import ResultsCache
+from impl.query_instrumentation import QueryInstrumentation
 
 class MCOWAnalyser: 
     """
     Property analyser for the "Many Countries, One World" ontology.
     """
     
+    # Attribute sets analysed by "getAttributesSimilarity"
+    social_attributes = ["rural_sanitation_access", "urban_sanitation_access", "unemployment_rate", "youth_unscolarized_percentage"]
+    demographic_attributes = ["average_children", "life_expectancy", "mortality_rate", "natality_rate", "population", "population_growth_rate", "0_to_14_years", "15_to_64_years", "65_years_and_over"]
+    economic_attributes = ["economical_growth_rate", "inflation_rate", "public_debt_rate"]
+    territorial_attributes = ["area_int", "is_neighbour_of"]    # Still need continent, subregion and time_zone, but these will be evaluated through graph hierarchies
+    
+    # Classification values analysed by "getDAFOAnalysis", as a lookup table {classification value: "strengths"/"weaknesses"}
+    dafo_polarities = {"age_balanced_population": "strengths", "extremely_elder_population": "weaknesses",
+                       "majorly_elder_population": "weaknesses", "extremely_underaged_population": "weaknesses"}
+    
+    for dafo_concept in ["natality", "rural_access", "urban_access"]:     # Concepts that are better the highest possible
+        dafo_polarities.update({"high_" + dafo_concept: "strengths", "very_high_" + dafo_concept: "strengths",
+                                "low_" + dafo_concept: "weaknesses", "very_low_" + dafo_concept: "weaknesses"})
+    
+    for dafo_concept in ["unscolarization", "unemployment_rate", "mortality", "inflation_rate", "debt"]:  # Concepts that are better the lowest possible
+        dafo_polarities.update({"low_" + dafo_concept: "strengths", "very_low_" + dafo_concept: "strengths",
+                                "high_" + dafo_concept: "weaknesses", "very_high_" + dafo_concept: "weaknesses"})
+    
+    del dafo_concept
+
+    class TemporalSeriesStore:
+        """
+        Columnar index of the temporal sub-entities of the MCOW ontology
+        (<country-YEAR> onto:attribute value; onto:year YEAR; rdfs:subClassOf wd:COUNTRY).
+
+        Each attribute is kept as a NumPy array shaped countries x years, alongside a mask
+        of the cells that really hold a value, so that looking up the history of a country is
+        an array slice instead of a SPARQL query. The most recent values stored directly on
+        the country entities are kept too, as one countries-long column per attribute.
+        """
+
+        def __init__(self, graph, instrumentation=None):
+            """
+            Builds the index with a single pass over the graph triples.
+
+            Args:
+                graph: rdflib.Graph object with the MCOW ontology on it
+                instrumentation: optional QueryInstrumentation shared with the analyser, which records every lookup
+            """
+            self.instrumentation = instrumentation if instrumentation is not None else QueryInstrumentation()
+            self.wd = Namespace("http://www.wikidata.org/entity/")
+            self.onto = Namespace("http://www.detalle-pais.es/ontology/")
+            self.__build(graph)
+
+        def __build(self, graph):
+            temporal_cells, current_cells = self.__collect_cells(graph, graph.subjects(unique=True))
+
+            self.countries = sorted(set([cell[0] for cell in temporal_cells] + [cell[0] for cell in current_cells]))
+            self.country_index = {country: i for i, country in enumerate(self.countries)}
+            self.years = np.array(sorted(set([cell[1] for cell in temporal_cells])), dtype=np.int64)
+            self.year_index = {int(year): i for i, year in enumerate(self.years)}
+
+            self.values = dict()            # Attribute -> float64 array (countries x years), NaN where missing
+            self.mask = dict()              # Attribute -> bool array (countries x years), True where there is a value
+            self.duplicates = dict()        # Attribute -> {(country index, year index): [values after the first one]}
+            self.integer_mask = dict()      # Attribute -> bool array (countries x years), True where the value is an integer
+            self.current_values = dict()    # Attribute -> float64 array (countries), NaN where missing
+            self.current_mask = dict()
+
+            self.__fill_cells(temporal_cells, current_cells)
+
+        def __collect_cells(self, graph, subjects):
+            """
+            Reads the values of the given subjects, grouped by subject and keeping the insertion order of the values.
+
+            Returns:
+                The temporal cells (country code, year, attribute, literal) and the current ones (country code, attribute, literal).
+            """
+            wd_prefix = str(self.wd)
+            onto_prefix = str(self.onto)
+            year_uri = self.onto.year
+
+            temporal_cells = list()
+            current_cells = list()
+
+            for subject in subjects:
+                parent_country = None
+                year = None
+                values = list()
+
+                for predicate, value in graph.predicate_objects(subject):
+                    if predicate == RDFS.subClassOf and str(value).startswith(wd_prefix):
+                        parent_country = str(value)[len(wd_prefix):]
+
+                    elif predicate == year_uri:
+                        year = int(value)
+
+                    elif isinstance(value, Literal) and str(predicate).startswith(onto_prefix):
+                        values.append((str(predicate)[len(onto_prefix):], value))
+
+                if parent_country is not None and year is not None:       # Temporal sub-entity (<country-YEAR>)
+                    for attr, value in values:
+                        if "year" not in attr.lower():      # Same exclusion the temporal SPARQL queries used to do
+                            temporal_cells.append((parent_country, year, attr, value))
+
+                elif str(subject).startswith(wd_prefix):
+                    for attr, value in values:
+                        current_cells.append((str(subject)[len(wd_prefix):], attr, value))
+
+            return temporal_cells, current_cells
+
+        def __fill_cells(self, temporal_cells, current_cells):
+            """
+            Writes the collected cells into the arrays (whose countries and years must already be indexed).
+            """
+            for country, year, attr, value in temporal_cells:
+                try:
+                    numeric_value = float(value)
+                except ValueError:          # Malformed literals are skipped, as the numeric SPARQL comparisons did
+                    continue
+
+                is_integer = numeric_value.is_integer() and re.search("[0-9]+\\.[0-9]+", str(value)) is None    # Same rule the temporal
+                                                                                                                    # entity data used to follow
+
+                if attr not in self.values:
+                    self.values[attr] = np.full((len(self.countries), len(self.years)), np.nan)
+                    self.mask[attr] = np.zeros((len(self.countries), len(self.years)), dtype=bool)
+                    self.integer_mask[attr] = np.zeros((len(self.countries), len(self.years)), dtype=bool)
+                    self.duplicates[attr] = dict()
+
+                i = self.country_index[country]
+                j = self.year_index[year]
+
+                if self.mask[attr][i, j]:   # Some years have more than one value for the same attribute: the first one
+                                            # is the one stored in the array (as SPARQL would return it first), the rest are kept aside
+                    self.duplicates[attr].setdefault((i, j), list()).append(int(numeric_value) if is_integer else numeric_value)
+                    continue
+
+                self.values[attr][i, j] = numeric_value
+                self.mask[attr][i, j] = True
+                self.integer_mask[attr][i, j] = is_integer
+
+            for country, attr, value in current_cells:
+                try:
+                    numeric_value = float(value)
+                except ValueError:          # Categorical attributes (classifications, alpha codes...) are not indexed
+                    continue
+
+                if attr not in self.current_values:
+                    self.current_values[attr] = np.full(len(self.countries), np.nan)
+                    self.current_mask[attr] = np.zeros(len(self.countries), dtype=bool)
+
+                i = self.country_index[country]
+
+                if not self.current_mask[attr][i]:
+                    self.current_values[attr][i] = numeric_value
+                    self.current_mask[attr][i] = True
+
+            self.attributes = sorted(self.values.keys())
+
+        def update_countries(self, graph, country_codes):
+            """
+            Reads again, from the graph, the values of the given countries and of their temporal sub-entities,
+            leaving the rows of the rest of the countries untouched (new countries and years are added to the arrays).
+
+            Args:
+                graph: rdflib.Graph object the store was built from, already modified
+                country_codes: Wikidata codes of the countries whose values changed
+            """
+            subjects = list()
+
+            for country in sorted(country_codes):
+                subjects.append(self.wd[country])
+                subjects.extend(subject for subject in graph.subjects(RDFS.subClassOf, self.wd[country]) if subject != self.wd[country])
+
+            temporal_cells, current_cells = self.__collect_cells(graph, subjects)
+
+            countries = sorted(set(self.countries) | set([cell[0] for cell in temporal_cells] + [cell[0] for cell in current_cells]))
+            years = sorted(set(int(year) for year in self.years) | set([cell[1] for cell in temporal_cells]))
+
+            if len(countries) != len(self.countries) or len(years) != len(self.years):
+                self.__reindex(countries, years)
+
+            for country in country_codes:       # Their previous values are dropped, and then read again
+                if country not in self.country_index:
+                    continue
+
+                i = self.country_index[country]
+
+                for attr in self.values:
+                    self.values[attr][i] = np.nan
+                    self.mask[attr][i] = False
+                    self.integer_mask[attr][i] = False
+                    self.duplicates[attr] = {position: values for position, values in self.duplicates[attr].items() if position[0] != i}
+
+                for attr in self.current_values:
+                    self.current_values[attr][i] = np.nan
+                    self.current_mask[attr][i] = False
+
+            self.__fill_cells(temporal_cells, current_cells)
+
+        def __reindex(self, countries, years):
+            """
+            Moves the arrays to new (sorted) countries and years axes, which must contain the current ones.
+            """
+            country_index = {country: i for i, country in enumerate(countries)}
+            year_index = {int(year): j for j, year in enumerate(years)}
+            rows = np.array([country_index[country] for country in self.countries], dtype=np.int64)
+            columns = np.array([year_index[int(year)] for year in self.years], dtype=np.int64)
+
+            for attr in self.values:
+                values = np.full((len(countries), len(years)), np.nan)
+                mask = np.zeros((len(countries), len(years)), dtype=bool)
+                integer_mask = np.zeros((len(countries), len(years)), dtype=bool)
+                values[np.ix_(rows, columns)] = self.values[attr]
+                mask[np.ix_(rows, columns)] = self.mask[attr]
+                integer_mask[np.ix_(rows, columns)] = self.integer_mask[attr]
+                self.values[attr] = values
+                self.mask[attr] = mask
+                self.integer_mask[attr] = integer_mask
+                self.duplicates[attr] = {(int(rows[i]), int(columns[j])): duplicated for (i, j), duplicated in self.duplicates[attr].items()}
+
+            for attr in self.current_values:
+                values = np.full(len(countries), np.nan)
+                mask = np.zeros(len(countries), dtype=bool)
+                values[rows] = self.current_values[attr]
+                mask[rows] = self.current_mask[attr]
+                self.current_values[attr] = values
+                self.current_mask[attr] = mask
+
+            self.countries = list(countries)
+            self.country_index = country_index
+            self.years = np.array(years, dtype=np.int64)
+            self.year_index = year_index
+
+        def get_series(self, country_wd_code, attribute, all_values=False):
+            """
+            Returns the year-sorted (years, values) arrays of an attribute of a country (empty if there is no data).
+            
+            If all_values is True, values is a list with every value recorded for each year instead.
+            """
+            return self.instrumentation.execute("temporal.series", {"country": country_wd_code, "attribute": attribute, "all_values": all_values},
+                                                lambda: self.__get_series(country_wd_code, attribute, all_values), rows=lambda result: len(result[0]))
+
+        def __get_series(self, country_wd_code, attribute, all_values):
+            if attribute not in self.values or country_wd_code not in self.country_index:
+                return np.array([], dtype=np.int64), (list() if all_values else np.array([], dtype=np.float64))
+
+            i = self.country_index[country_wd_code]
+            row_mask = self.mask[attribute][i]
+
+            if not all_values:
+                return self.years[row_mask], self.values[attribute][i][row_mask]
+
+            year_positions = np.flatnonzero(row_mask)
+            year_values = [[self.values[attribute][i, j]] + self.duplicates[attribute].get((i, j), list()) for j in year_positions]
+
+            return self.years[row_mask], year_values
+
+        def get_country_data(self, country_wd_code):
+            """
+            Returns a dictionary whose keys are the attributes of the country and whose values are lists of pairs (year, value),
+            each value being an int or a float depending on how it was written in the ontology.
+            """
+            return self.instrumentation.execute("temporal.country_data", {"country": country_wd_code},
+                                                lambda: self.__get_country_data(country_wd_code),
+                                                rows=lambda result: sum(len(pairs) for pairs in result.values()))
+
+        def __get_country_data(self, country_wd_code):
+            country_data = dict()
+
+            if country_wd_code not in self.country_index:
+                return country_data
+
+            i = self.country_index[country_wd_code]
+
+            for attr in self.attributes:
+                year_positions = np.flatnonzero(self.mask[attr][i])
+
+                if len(year_positions) == 0:
+                    continue
+
+                country_data[attr] = list()
+
+                for j in year_positions:
+                    first_value = self.values[attr][i, j]
+                    country_data[attr].append((int(self.years[j]), int(first_value) if self.integer_mask[attr][i, j] else float(first_value)))
+                    country_data[attr].extend((int(self.years[j]), value) for value in self.duplicates[attr].get((i, j), list()))
+
+            return country_data
+
+        def scan_tendency(self, attribute, increasing, factor_threshold):
+            """
+            Tendency test of an attribute over every country at once, with a single vectorised pass over
+            the year-sorted series (each year is compared with the next year that has a value).
+
+            Args:
+                attribute: name of the attribute to analyse
+                increasing: True to test increasing pairs (first < second), False to test decreasing ones
+                factor_threshold: a pair also passes if (second/first)*100 reaches this value
+
+            Returns:
+                Four arrays with one position per country of the store: the amount of years with a value, the
+                amount of those years whose pair with the next one passes the test, and the first and last values.
+            """
+            return self.instrumentation.execute("temporal.tendency_scan", {"attribute": attribute, "increasing": increasing,
+                                                                           "factor_threshold": factor_threshold},
+                                                lambda: self.__scan_tendency(attribute, increasing, factor_threshold),
+                                                rows=lambda result: int((result[0] > 0).sum()))
+
+        def __scan_tendency(self, attribute, increasing, factor_threshold):
+            n_countries = len(self.countries)
+            n_years = len(self.years)
+
+            if attribute not in self.values or n_years == 0:
+                empty_values = np.full(n_countries, np.nan)
+                return np.zeros(n_countries, dtype=np.int64), np.zeros(n_countries, dtype=np.int64), empty_values, empty_values
+
+            values = self.values[attribute]
+            mask = self.mask[attribute]
+            rows = np.arange(n_countries)
+
+            positions = np.where(mask, np.arange(n_years), n_years)
+            next_positions = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1]    # Closest year with a value, from each year on
+            next_positions = np.concatenate([next_positions[:, 1:], np.full((n_countries, 1), n_years)], axis=1)
+
+            has_pair = mask & (next_positions < n_years)
+            next_values = values[rows[:, None], np.minimum(next_positions, n_years - 1)]
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ordered = (values < next_values) if increasing else (values > next_values)
+                within_factor = (values != 0) & ((next_values / values) * 100 >= factor_threshold)
+
+            total = mask.sum(axis=1)
+            total_filtered = (has_pair & (ordered | within_factor)).sum(axis=1)
+
+            first_positions = np.argmax(mask, axis=1)
+            last_positions = n_years - 1 - np.argmax(mask[:, ::-1], axis=1)
+            first_values = np.where(total > 0, values[rows, first_positions], np.nan)
+            last_values = np.where(total > 0, values[rows, last_positions], np.nan)
+
+            return total, total_filtered, first_values, last_values
+
+        def count_countries_with_series(self, attribute):
+            """
+            Returns how many countries have at least two years with a value for the attribute (the minimum for a tendency).
+            """
+            if attribute not in self.mask:
+                return 0
+
+            return int((self.mask[attribute].sum(axis=1) >= 2).sum())
+
+        def get_duplicated_countries(self, attribute):
+            """
+            Returns the codes of the countries that have some year with more than one value for the attribute.
+            """
+            if attribute not in self.duplicates:
+                return set()
+
+            return set([self.countries[i] for i, j in self.duplicates[attribute]])
+
+        def get_current_matrix(self, country_codes, attributes):
+            """
+            Returns the values stored on the given country entities for the given attributes, as a float64 array
+            (countries x attributes) alongside the mask of the cells that hold a value.
+            """
+            return self.instrumentation.execute("temporal.current_matrix", {"countries": len(country_codes), "attributes": list(attributes)},
+                                                lambda: self.__get_current_matrix(country_codes, attributes),
+                                                rows=lambda result: int(result[1].sum()))
+
+        def __get_current_matrix(self, country_codes, attributes):
+            values = np.full((len(country_codes), len(attributes)), np.nan)
+            mask = np.zeros((len(country_codes), len(attributes)), dtype=bool)
+            rows = np.array([self.country_index.get(country, -1) for country in country_codes], dtype=np.int64)
+            known = rows >= 0
+
+            for j, attribute in enumerate(attributes):
+                if attribute in self.current_values:
+                    values[known, j] = self.current_values[attribute][rows[known]]
+                    mask[known, j] = self.current_mask[attribute][rows[known]]
+
+            return values, mask
+
+        def get_current_value(self, country_wd_code, attribute):
+            """
+            Returns the value stored on the country entity itself for an attribute, or None if it has no such value.
+            """
+            return self.instrumentation.execute("temporal.current_value", {"country": country_wd_code, "attribute": attribute},
+                                                lambda: self.__get_current_value(country_wd_code, attribute))
+
+        def __get_current_value(self, country_wd_code, attribute):
+            if attribute not in self.current_values or country_wd_code not in self.country_index:
+                return None
+
+            i = self.country_index[country_wd_code]
+
+            return float(self.current_values[attribute][i]) if self.current_mask[attribute][i] else None
+
+    class PairwiseSimilarityTable:
+        """
+        On-disk table with the similarity of every pair of countries, memory-mapped at startup.
+
+        Values live in a float64 .npy file shaped countries x countries x channels (one channel per
+        value returned by "getAttributesSimilarity" for each attribute set), alongside a JSON file with
+        the countries order, the channels, the names of the LCS classes and the hash of the source ontology.
+        Pairs that have not been computed yet are NaN, so the table can be filled both offline and lazily.
+        """
+
+        def __init__(self, path, countries, channels, source_hash=None):
+            """
+            Opens the table stored at path, or creates an empty one if it does not exist or belongs
+            to another ontology, countries or channels.
+
+            Args:
+                path: path of the .npy file (the metadata is stored at path + ".json")
+                countries: list of country codes, in the order of the rows and columns
+                channels: list of channel names
+                source_hash: hash of the source ontology file, used to discard outdated tables
+
+            Raises:
+                OSError: if the table cannot be opened or created, or its folder is not writable (both the values
+                    and the metadata are updated as new pairs are computed)
+            """
+            folder = os.path.dirname(os.path.abspath(path))
+            if not os.access(folder, os.W_OK):
+                raise PermissionError(f"The folder '{folder}' is not writable.")
+
+            self.path = path
+            self.meta_path = path + ".json"
+            self.lock = threading.Lock()
+            self.country_index = {country: i for i, country in enumerate(countries)}
+            self.channel_index = {channel: i for i, channel in enumerate(channels)}
+
+            meta = {"source_hash": source_hash, "countries": list(countries), "channels": list(channels), "lcs_names": list()}
+            stored_meta = None
+
+            if os.path.exists(self.path) and os.path.exists(self.meta_path):
+                with open(self.meta_path, encoding="utf-8") as f:
+                    stored_meta = json.load(f)
+
+            if stored_meta is not None and all(stored_meta.get(k) == meta[k] for k in ["source_hash", "countries", "channels"]):
+                self.meta = stored_meta
+                self.values = np.load(self.path, mmap_mode="r+")
+
+            else:   # Missing or outdated table: a new empty one is created
+                self.meta = meta
+                self.values = np.lib.format.open_memmap(self.path, mode="w+", dtype=np.float64,
+                                                        shape=(len(countries), len(countries), len(channels)))
+                self.values[:] = np.nan
+                self.values.flush()
+                self.__save_meta()
+
+            self.lcs_index = {name: i for i, name in enumerate(self.meta["lcs_names"])}
+
+        def __save_meta(self):
+            tmp_path = self.meta_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.meta, f)
+            os.replace(tmp_path, self.meta_path)
+
+        def get(self, country_one, country_two, channels):
+            """
+            Returns the stored values of the given channels for a pair of countries, or None if they are not computed yet.
+            """
+            positions = [self.channel_index[channel] for channel in channels]
+            row = self.values[self.country_index[country_one], self.country_index[country_two], positions]
+
+            return None if np.isnan(row).any() else row
+
+        def put(self, country_one, country_two, channel_values, flush=True):
+            """
+            Stores the values ({channel: value}) of a pair of countries (in both orders, as every similarity is symmetric).
+            """
+            i = self.country_index[country_one]
+            j = self.country_index[country_two]
+            positions = [self.channel_index[channel] for channel in channel_values]
+
+            with self.lock:
+                self.values[i, j, positions] = list(channel_values.values())
+                self.values[j, i, positions] = list(channel_values.values())
+
+                if flush:
+                    self.values.flush()
+
+        def get_column(self, country, channel):
+            """
+            Returns the values of a channel between a country and every country of the table (NaN if not computed).
+            """
+            return self.values[self.country_index[country], :, self.channel_index[channel]]
+
+        def get_lcs_id(self, lcs_name):
+            """
+            Returns the numeric id of a LCS class name (-1 for None), registering it if it is new.
+            """
+            if lcs_name is None:
+                return -1
+
+            with self.lock:
+                if lcs_name not in self.lcs_index:
+                    self.lcs_index[lcs_name] = len(self.meta["lcs_names"])
+                    self.meta["lcs_names"].append(lcs_name)
+                    self.__save_meta()
+
+                return self.lcs_index[lcs_name]
+
+        def get_lcs_name(self, lcs_id):
+            return None if lcs_id < 0 else self.meta["lcs_names"][int(lcs_id)]
+
+        def flush(self):
+            self.values.flush()
+
     class LocalSemanticSimilarityCalculator:
         """
         Semantic similarity calculator that uses a local MCOW ontology and queries over it.
         """
         
-        def __init__(self, graph):
+        def __init__(self, graph, temporal_series=None, cache=None, instrumentation=None):
             """
             RDF local graph is laoded
             
             Args:
                 graph: rdflib.Graph object with the MCOW ontology on it
+                temporal_series: optional TemporalSeriesStore built over the same graph, used to read numeric values
+                cache: optional ResultsCache shared with the analyser (a new one is created if not given)
+                instrumentation: optional QueryInstrumentation shared with the analyser, which records every lookup
             """
             self.graph = graph
-            self.cache = {}
+            self.temporal_series = temporal_series
+            self.cache = cache if cache is not None else ResultsCache()
+            self.instrumentation = instrumentation if instrumentation is not None else QueryInstrumentation()
             self.wd = Namespace("http://www.wikidata.org/entity/")
             self.onto = Namespace("http://www.detalle-pais.es/ontology/")
+            self.__init_class_closure()
+            self.__init_predicate_index()
         
-        def execute_query(self, query):
-            """Local SPARQL querying over the local graph"""
-            cache_key = hash(query)
-            if cache_key in self.cache:
-                return self.cache[cache_key]
+        def __init_predicate_index(self):
+            """
+            Indexes the distinct predicates of the graph by their local name (the URI suffix), so that single-subject
+            lookups scan exact predicate URIs with "graph.objects" instead of running regex-filtered SPARQL queries.
+            The predicates matched by each property name are resolved once and kept in resolved_predicates.
+            """
+            self.predicate_suffix_index = dict()
             
-            try:
-                results = self.graph.query(query)
-                result_list = list(results)
-                self.cache[cache_key] = result_list
-                return result_list
-            except Exception as e:
-                print(f"Error en consulta SPARQL: {e}")
-                return []
+            for predicate in self.graph.predicates(unique=True):
+                local_name = str(predicate).replace("#", "/").split("/")[-1]
+                self.predicate_suffix_index.setdefault(local_name, []).append(predicate)
             
-        def get_least_common_subsumer(self, entity1_qid, entity2_qid):
+            self.resolved_predicates = dict()
+        
+        def __resolve_predicates(self, property_name):
             """
-            Finds the Least Common Subsumer (LCS) between two given entities.
+            Returns the exact predicate URIs whose local name contains property_name (case-insensitive). Only the
+            keys of predicate_suffix_index are searched (once per distinct local name, instead of once per predicate
+            URI), and the result is kept.
+            """
+            if property_name not in self.resolved_predicates:
+                pattern = re.compile(property_name, re.IGNORECASE)
+                matching_names = [local_name for local_name in self.predicate_suffix_index if pattern.search(local_name)]
+                self.resolved_predicates[property_name] = [predicate for local_name in matching_names
+                                                           for predicate in self.predicate_suffix_index[local_name]]
+            
+            return self.resolved_predicates[property_name]
+
+        def update_indexes(self, changed_triples, country_codes):
             """
+            Updates the class closure and the predicate index after the graph was modified, only where the
+            changed triples touch them (the closure is only rebuilt if a class with subclasses changed its parents).
 
-            query = f"""
-            PREFIX wd:   <http://www.wikidata.org/entity/>
-            PREFIX onto: <http://www.detalle-pais.es/ontology/>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+            Args:
+                changed_triples: the added and removed triples, already applied to the graph
+                country_codes: Wikidata codes of the entities whose classes may have changed
+            """
+            changed_children = set(subject for subject, predicate, _ in changed_triples if predicate == RDFS.subClassOf)
 
-            SELECT DISTINCT ?lcs ?lcsLabel WHERE {{
-                wd:{entity1_qid} rdf:type ?reg1 .
-                wd:{entity2_qid} rdf:type ?reg2 .
-                
-                FILTER(STRSTARTS(STR(?reg1), "http://www.detalle-pais.es/ontology/"))
-                FILTER(STRSTARTS(STR(?reg2), "http://www.detalle-pais.es/ontology/"))
+            if any((None, RDFS.subClassOf, child) in self.graph for child in changed_children):
+                self.__init_class_closure()     # Their descendants' ancestors change as well
+
+            else:
+                for child in changed_children:
+                    parents = list(self.graph.objects(child, RDFS.subClassOf))
+                    if parents:
+                        self.class_parents[child] = parents
+                    else:
+                        self.class_parents.pop(child, None)
+
+                    self.class_ancestors.pop(child, None)
+                    self.class_strict_ancestors.pop(child, None)
+                    self.__get_ancestors(child)
+                    for parent in parents:
+                        self.__get_ancestors(parent)
+
+                for country_code in country_codes:
+                    self.entity_classes.pop(country_code, None)
+
+            predicates_changed = False
+
+            for predicate in set(predicate for _, predicate, _ in changed_triples):
+                local_name = str(predicate).replace("#", "/").split("/")[-1]
+                indexed_predicates = self.predicate_suffix_index.get(local_name, list())
+                in_graph = (None, predicate, None) in self.graph
+
+                if in_graph and predicate not in indexed_predicates:
+                    self.predicate_suffix_index.setdefault(local_name, []).append(predicate)
+                    predicates_changed = True
+
+                elif not in_graph and predicate in indexed_predicates:
+                    indexed_predicates.remove(predicate)
+                    if not indexed_predicates:
+                        del self.predicate_suffix_index[local_name]
+                    predicates_changed = True
+
+            if predicates_changed:
+                self.resolved_predicates = dict()
+
+        def __init_class_closure(self):
+            """
+            Precomputes the transitive closure of rdfs:subClassOf: every class gets a bit, and the ancestors of
+            each class (itself included, as rdfs:subClassOf* would) are stored as a bitset (a Python int), alongside
+            its strict ancestors (rdfs:subClassOf+). The ontology classes are flagged in a mask, so depths and least
+            common subsumers are answered with set operations instead of property-path queries.
+            """
+            self.class_parents = dict()
+            
+            for child, parent in self.graph.subject_objects(RDFS.subClassOf):
+                self.class_parents.setdefault(child, list()).append(parent)
+            
+            self.class_bits = dict()        # Class -> bit position
+            self.classes_by_bit = list()    # Bit position -> class
+            self.onto_classes_mask = 0
+            self.class_ancestors = dict()
+            self.class_strict_ancestors = dict()
+            self.entity_classes = dict()    # Entity QID -> its ontology classes (rdf:type)
+            
+            for child, parents in list(self.class_parents.items()):
+                self.__get_ancestors(child)
+                for parent in parents:
+                    self.__get_ancestors(parent)
+        
+        def __get_class_bit(self, class_uri):
+            if class_uri not in self.class_bits:
+                self.class_bits[class_uri] = len(self.classes_by_bit)
+                self.classes_by_bit.append(class_uri)
                 
-                ?reg1 rdfs:subClassOf* ?lcs .
-                ?reg2 rdfs:subClassOf* ?lcs .
-                FILTER(STRSTARTS(STR(?lcs), "http://www.detalle-pais.es/ontology/"))
+                if str(class_uri).startswith(str(self.onto)):
+                    self.onto_classes_mask |= 1 << self.class_bits[class_uri]
+            
+            return 1 << self.class_bits[class_uri]
+        
+        def __get_ancestors(self, class_uri):
+            """
+            Returns the (reflexive) ancestors bitset of a class, computing it if it is not computed yet.
+            """
+            if class_uri not in self.class_ancestors:
+                strict_ancestors = 0
+                visited = set()
+                pending = list(self.class_parents.get(class_uri, list()))
                 
-                FILTER NOT EXISTS {{
-                    ?deeper rdfs:subClassOf+ ?lcs .
-                    ?reg1 rdfs:subClassOf* ?deeper .
-                    ?reg2 rdfs:subClassOf* ?deeper .
-                }}
+                while pending:
+                    ancestor = pending.pop()
+                    if ancestor in visited:
+                        continue
+                    visited.add(ancestor)
+                    strict_ancestors |= self.__get_class_bit(ancestor)
+                    pending.extend(self.class_parents.get(ancestor, list()))
                 
-                OPTIONAL {{ ?lcs rdfs:label ?lcsLabel }}
-            }}
-            ORDER BY DESC(STRLEN(STR(?lcs)))
-            LIMIT 1
+                self.class_strict_ancestors[class_uri] = strict_ancestors
+                self.class_ancestors[class_uri] = strict_ancestors | self.__get_class_bit(class_uri)
+            
+            return self.class_ancestors[class_uri]
+        
+        def __get_entity_classes(self, entity_qid):
             """
-
-            results = self.execute_query(query)
-            if results:
-                lcs_uri = str(results[0].lcs)
-                label = str(results[0].lcsLabel) if results[0].lcsLabel else None
-                return lcs_uri, label or lcs_uri.split("/")[-1]
-            return None, None
+            Returns the ontology classes (rdf:type) of a Wikidata entity.
+            """
+            if entity_qid not in self.entity_classes:
+                self.entity_classes[entity_qid] = [class_uri for class_uri in self.graph.objects(self.wd[entity_qid], RDF.type)
+                                                   if str(class_uri).startswith(str(self.onto))]
+            
+            return self.entity_classes[entity_qid]
+        
+        def __iterate_bits(self, bitset):
+            while bitset:
+                lowest_bit = bitset & -bitset
+                yield self.classes_by_bit[lowest_bit.bit_length() - 1]
+                bitset ^= lowest_bit
+        
+        def get_least_common_subsumer(self, entity1_qid, entity2_qid):
+            """
+            Finds the Least Common Subsumer (LCS) between two given entities.
+            """
+            candidates = 0
+            
+            for class_one in self.__get_entity_classes(entity1_qid):
+                for class_two in self.__get_entity_classes(entity2_qid):
+                    common_ancestors = self.__get_ancestors(class_one) & self.__get_ancestors(class_two)
+                    
+                    below_other_common_ancestor = 0      # Common ancestors that have a deeper common ancestor under them are discarded
+                    for deeper in self.__iterate_bits(common_ancestors):
+                        below_other_common_ancestor |= self.class_strict_ancestors[deeper]
+                    
+                    candidates |= common_ancestors & self.onto_classes_mask & ~below_other_common_ancestor
+            
+            if not candidates:
+                return None, None
+            
+            lcs = max(self.__iterate_bits(candidates), key=lambda class_uri: (len(str(class_uri)), str(class_uri)))     # The most specific (longest) URI
+            lcs_uri = str(lcs)
+            label = self.graph.value(lcs, RDFS.label)
+            
+            return lcs_uri, str(label) if label else lcs_uri.split("/")[-1]
         
         def get_depth(self, entity_qid):
             """
             Calculates the depth of a given entity.
             """
-            query = f"""
-            PREFIX wd:   <http://www.wikidata.org/entity/>
-            PREFIX onto: <http://www.detalle-pais.es/ontology/>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-            SELECT (COUNT(DISTINCT ?ancestor) AS ?count) WHERE {{
-                wd:{entity_qid} rdf:type ?reg .
-                
-                FILTER(STRSTARTS(STR(?reg), "http://www.detalle-pais.es/ontology/"))
-                
-                ?reg rdfs:subClassOf* ?ancestor .
-                
-                FILTER(STRSTARTS(STR(?ancestor), "http://www.detalle-pais.es/ontology/"))
-            }}
-            """
-
-            results = self.execute_query(query)
-            return int(results[0]["count"]) if results else 0
+            ancestors = 0
+            for class_uri in self.__get_entity_classes(entity_qid):
+                ancestors |= self.__get_ancestors(class_uri)
+            
+            return (ancestors & self.onto_classes_mask).bit_count()
         
         def get_depth_bis(self, entity_qid):
             """
             Calculates the depth of a given entity.
             """
-            if entity_qid.startswith("http"):
-                lcs_uri = f"<{entity_qid}>"
-            else:
-                lcs_uri = f"onto:{entity_qid}"
-
-            query = f"""
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            PREFIX onto: <http://www.detalle-pais.es/ontology/>
-
-            SELECT (COUNT(DISTINCT ?ancestor) AS ?count) WHERE {{
-                {lcs_uri} rdfs:subClassOf* ?ancestor .
-                FILTER(STRSTARTS(STR(?ancestor), "http://www.detalle-pais.es/ontology/"))
-            }}
-            """
-
-            results = self.execute_query(query)
-            if results and len(results) > 0:
-                return int(results[0]["count"])
-            return 0
+            class_uri = URIRef(entity_qid) if entity_qid.startswith("http") else self.onto[entity_qid]
+            
+            return (self.__get_ancestors(class_uri) & self.onto_classes_mask).bit_count()
         
         def wu_palmer_similarity(self, entity1_qid, entity2_qid):
             """
             Wu & Palmer similarity = 2 * depth(lcs) / (depth(c1) + depth(c2))
             """
+            return self.instrumentation.execute("calculator.wu_palmer_similarity", {"entity_one": entity1_qid, "entity_two": entity2_qid},
+                                                lambda: self.__wu_palmer_similarity(entity1_qid, entity2_qid),
+                                                rows=lambda result: 0 if result[0] is None else 1)
+
+        def __wu_palmer_similarity(self, entity1_qid, entity2_qid):
             lcs_qid, _ = self.get_least_common_subsumer(entity1_qid, entity2_qid)
             if not lcs_qid:
                 return (None, 0.0)
@@ -154,22 +765,16 @@ class MCOWAnalyser:
         
         def get_property_values(self, country_wd_code, property_name):
             """
-            Gets property-value pairs of a given entity
-            """
-            
-            query = f"""
-            PREFIX wdt: <http://www.wikidata.org/prop/direct/>
-            PREFIX wd: <http://www.wikidata.org/entity/>
-
-            SELECT ?property ?value WHERE {{
-                wd:{country_wd_code} ?property ?value .
-                FILTER regex(str(?property), "{property_name}", "i")
-            }}
+            Gets property-value pairs of a given entity (memoised by country and property)
             """
-                        
-            results = self.graph.query(query)
+            return self.instrumentation.execute("calculator.property_values", {"country": country_wd_code, "property": property_name},
+                                                lambda: self.__get_property_values(country_wd_code, property_name),
+                                                cache=self.cache, namespace="property_values", key=(country_wd_code, property_name))
+        
+        def __get_property_values(self, country_wd_code, property_name):
+            country = self.wd[country_wd_code]
             
-            return set([str(row.value) for row in results])
+            return set([str(value) for predicate in self.__resolve_predicates(property_name) for value in self.graph.objects(country, predicate)])
         
         def jaccard_property_similarity(self, country_one_wd_code, country_two_wd_code, property_name):
             """
@@ -194,24 +799,33 @@ class MCOWAnalyser:
 
         def attribute_similarity(self, country_one, country_two, property_name):
             """
-            Returns the division of the values of a given property
-            """
-            query = f"""                
-                SELECT DISTINCT ?entityOneLabel ?entityTwoLabel ?propertyOneValue ?propertyTwoValue WHERE {{
-                    wd:{country_one} onto:{property_name} ?propertyOneValue.
-                    wd:{country_two} onto:{property_name} ?propertyTwoValue.
-                }}
-
-                LIMIT 1     # Avoid wasting unnecessary time looking for more triples that are not needed
+            Returns the division of the values of a given property (memoised, (A, B) and (B, A) share the entry)
             """
+            return self.instrumentation.execute("calculator.attribute_similarity",
+                                                {"country_one": country_one, "country_two": country_two, "property": property_name},
+                                                lambda: self.__attribute_similarity(country_one, country_two, property_name), cache=self.cache,
+                                                namespace="attribute_similarity", key=self.cache.symmetric_key(country_one, country_two, property_name))
+        
+        def __attribute_similarity(self, country_one, country_two, property_name):
+            if self.temporal_series is not None:
+                property_one_value = self.temporal_series.get_current_value(country_one, property_name)
+                property_two_value = self.temporal_series.get_current_value(country_two, property_name)
+                
+                if property_one_value is None or property_two_value is None or max(property_one_value, property_two_value) == 0:
+                    return -1       # Same flag as below: the attribute is ignored
+                
+                return min(property_one_value, property_two_value) / max(property_one_value, property_two_value)
+            
             property_one_value = 0
             property_two_value = 0
+            
+            predicate = self.onto[property_name]
+            value_one = next(self.graph.objects(self.wd[country_one], predicate), None)     # First value of each one, as the
+            value_two = next(self.graph.objects(self.wd[country_two], predicate), None)     # former "LIMIT 1" query returned
 
-            result = self.graph.query(query)
-
-            for row in result:
-                property_one_value = float(row.propertyOneValue)
-                property_two_value = float(row.propertyTwoValue)
+            if value_one is not None and value_two is not None:
+                property_one_value = float(value_one)
+                property_two_value = float(value_two)
             
             if max(property_one_value, property_two_value) == 0:    # If neither of them have this attribute, it will be ignored, as taking it into account
                 return -1                                           # would demenish the similarity value (so a special value is returned as a flag).
@@ -219,128 +833,310 @@ class MCOWAnalyser:
             
             return min(property_one_value, property_two_value) / max(property_one_value, property_two_value)
     
-    def __init__(self, graph):
+    def __init__(self, graph, similarity_table_path=None, source_hash=None, cache_max_entries=10000, cache_max_bytes=64 * 1024 * 1024,
+                 embedding_model_path="./impl/trained_embeddings_model.pt", warm_embeddings=False, use_exported_embeddings=True,
+                 slow_query_threshold=None, query_hooks=None, parallel_workers=None, parallel_backend="thread"):
         """
         Initializes the analyser by using a MCOW graph, by also pre-loading 
         the avalilable countries dictionary for future queries purposes.
         
-        Furthermore, a dictionary serves as a cache, to store the queries results
-        and avoid processing again an already executed query.
+        Furthermore, a bounded LRU cache (shared with the similarity calculator) stores the queries
+        results, to avoid processing again an already executed query.
         
         Args:
             graph: rdflib graph object with a MCOW's ontology on it.
+            similarity_table_path: optional path of the on-disk pairwise similarity table (.npy) to memory-map (if it
+                cannot be opened or created, e.g. in a read-only folder, the analyser runs without it).
+            source_hash: hash of the ontology file the graph was loaded from, to discard outdated similarity tables.
+            cache_max_entries: maximum amount of cached results.
+            cache_max_bytes: maximum estimated size of the cached results, in bytes.
+            embedding_model_path: path of the trained embedding model, which is only loaded the first time it is needed.
+            warm_embeddings: whether to load the embedding model in a background thread right away.
+            use_exported_embeddings: whether to read the embeddings from the artefact written by "export_embeddings"
+                (memory-mapped, without importing torch) when it is available and up to date.
+            slow_query_threshold: seconds from which a graph lookup is logged as a slow one (None to disable).
+            query_hooks: callables that receive the record of every graph lookup (see impl.query_instrumentation).
+            parallel_workers: number of workers "analyse_graph_values" fans the countries out to (None or 1, the
+                default, for the single-threaded vectorised scan; if None, a parallel call uses one per CPU). With the countries of the ontology (a couple hundred),
+                neither backend helps: the vectorised scan takes well under a millisecond, and dispatching the chunks
+                to the workers costs several times more.
+            parallel_backend: "thread" (a thread pool) or "process" (a pool of processes forked from this one, which
+                share its read-only graph and indexes; only available where "fork" is).
             
         """
         self.graph = graph
-        self.cache = {}
-        self.__init_country_list()
-        self._init_numerical_attributes_list()
-        self.__init_country_alpha_list()
-        self.local_similarity_calculator = self.LocalSemanticSimilarityCalculator(graph)
-        self.model = torch.load("./impl/trained_embeddings_model.pt", weights_only=False)
+        self.cache = ResultsCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes)
+        self.__init_ontology_indexes()
+        self.query_instrumentation = QueryInstrumentation(slow_query_threshold=slow_query_threshold, hooks=query_hooks)
+        self.temporal_series = self.TemporalSeriesStore(graph, self.query_instrumentation)
+        self.local_similarity_calculator = self.LocalSemanticSimilarityCalculator(graph, self.temporal_series, self.cache, self.query_instrumentation)
+        
+        self.embedding_model_path = embedding_model_path
+        self.exported_embeddings_path = get_exported_embeddings_path(embedding_model_path) if use_exported_embeddings else None
+        self.embedding_lock = threading.Lock()
+        self.embeddings_loaded = False
+        self.embedding_load_time = None
+        self.__model = None
+        
+        if warm_embeddings:
+            self.warm_up_embeddings()
+        
+        if parallel_backend not in ["thread", "process"]:
+            raise Exception("Please, introduce a valid parallel backend ('thread' or 'process').")
+        
+        if parallel_workers is not None and (not isinstance(parallel_workers, int) or parallel_workers < 1):
+            raise Exception("Please, introduce a valid amount of parallel workers (None or an integer greater than 0).")
+        
+        self.parallel_workers = parallel_workers
+        self.parallel_backend = parallel_backend
+        self.parallel_executor = None
+        self.parallel_executor_lock = threading.Lock()
+        
+        self.delta_lock = threading.Lock()
+        self.stale_similarity_countries = set()     # Countries modified by "apply_delta", whose stored similarities no longer apply
+        
+        self.similarity_table = None
+        if similarity_table_path is not None:
+            try:
+                self.similarity_table = self.PairwiseSimilarityTable(similarity_table_path, list(self.countries_in_ontology.values()),
+                                                                     self.__similarity_channels(), source_hash)
+            except OSError as e:    # E.g. a read-only data folder: the similarities are computed on demand instead
+                print(f"Error opening the pairwise similarity table {similarity_table_path}: {e}")
 
         
         print(f"{len(self.graph)} triples loaded.")
     
-    def __init_country_list(self):
-        countries_query = """
-                PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                PREFIX owl: <http://www.w3.org/2002/07/owl#>
-                PREFIX wd: <http://www.wikidata.org/entity/>
-                
-                SELECT DISTINCT ?entity ?entityLabel WHERE {
-                    ?entity rdf:type ?class ;
-                    
-                    ?property ?value.
-                
-                    # Solo entidades de Wikidata
-                    FILTER(STRSTARTS(STR(?entity), STR(wd:)))
-                    
-                    ?entity rdfs:label ?entityLabel
-                
-                }
-                
-                ORDER BY ASC(?entityLabel)
+    def __init_ontology_indexes(self):
         """
-
-        results = self.graph.query(countries_query)
-        self.countries_in_ontology = dict()
-
-        for row in results:
-            country_uri = "Q"+str(row.entity).split("Q")[-1]
-            country_name = str(row.entityLabel)
+        Builds, in a single pass over the triples of the graph (without SPARQL), the indexes every query relies on:
+        
+        - countries_in_ontology: {country label: Wikidata code} of the typed and labelled Wikidata entities, sorted by label.
+        - alpha_codes: {country label: (alpha code, class)} of those entities that have an alpha code.
+        - numerical_attributes_list: sorted names of the ontology properties of those entities, except the
+          classifications and the non-numeric ones (which make no sense when analysing tendencies).
+        - country_classifications: {Wikidata code: [(classification property URI, value), ...]}, used by the DAFO analysis.
+        
+        The values each Wikidata entity contributes are kept in ontology_entities, so that "apply_delta" only reads
+        again the entities it modifies.
+        """
+        wd_prefix = "http://www.wikidata.org/entity/"
+        
+        self.ontology_entities = dict()     # Wikidata entity -> its classes, labels, alpha codes, ontology properties and classifications
+        
+        for subject, predicate, value in self.graph.triples((None, None, None)):
+            if not str(subject).startswith(wd_prefix):     # Solo entidades de Wikidata
+                continue
+            
+            if subject not in self.ontology_entities:
+                self.ontology_entities[subject] = {"classes": [], "labels": [], "alpha_codes": [], "properties": set(), "classifications": []}
             
-            self.countries_in_ontology[country_name] = country_uri
+            self.__index_entity_value(self.ontology_entities[subject], predicate, value)
+        
+        self.__derive_ontology_indexes()
         
         print(f"MCOW ontology contains {len(self.countries_in_ontology)} countries.")
+        print(f"MCOW ontology contains {len(self.numerical_attributes_list)} numerical attributes.")
     
-    def __init_country_alpha_list(self):
-        countries_query = """
-                PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                PREFIX owl: <http://www.w3.org/2002/07/owl#>
-                PREFIX wd: <http://www.wikidata.org/entity/>
-                
-                SELECT DISTINCT ?entity ?entityLabel ?value ?continentClass WHERE {
-                    ?entity rdf:type ?continentClass ;
-                    
-                    ?property ?value.
-                
-                    # Solo entidades de Wikidata
-                    FILTER(STRSTARTS(STR(?entity), STR(wd:)))
-                    FILTER regex(str(?property), "alpha", "i") 
-                    
-                    
-                    ?entity rdfs:label ?entityLabel
-                
-                }
-                
-                ORDER BY ASC(?entityLabel)
+    def __index_entity_value(self, entity_record, predicate, value):
+        onto_prefix = "http://www.detalle-pais.es/ontology/"
+        
+        if predicate == RDF.type:
+            entity_record["classes"].append(value)
+        elif predicate == RDFS.label:
+            entity_record["labels"].append(value)
+        
+        predicate_str = str(predicate)
+        
+        if "alpha" in predicate_str.lower():
+            entity_record["alpha_codes"].append(value)
+        
+        if predicate_str.startswith(onto_prefix):
+            entity_record["properties"].add(predicate)
+        
+        if predicate_str.endswith("classification"):
+            entity_record["classifications"].append((predicate_str, str(value)))
+    
+    def __update_ontology_indexes(self, entities):
         """
-
-        results = self.graph.query(countries_query)
-        self.alpha_codes= dict()
-
-        for row in results:
-            country_name = str(row.entityLabel)
-            alpha_code = str(row.value)
-            continent_class = str(row.continentClass).split("/")[-1]
+        Reads again the values of the given Wikidata entities from the graph and derives the indexes from them.
+        """
+        for entity in entities:
+            entity_record = {"classes": [], "labels": [], "alpha_codes": [], "properties": set(), "classifications": []}
+            
+            for predicate, value in self.graph.predicate_objects(entity):
+                self.__index_entity_value(entity_record, predicate, value)
             
-            self.alpha_codes[country_name] = (alpha_code, continent_class)
+            if (entity, None, None) in self.graph:
+                self.ontology_entities[entity] = entity_record      # An already known entity keeps its position
+            else:
+                self.ontology_entities.pop(entity, None)
         
-    def _init_numerical_attributes_list(self):
+        self.__derive_ontology_indexes()
+    
+    def __derive_ontology_indexes(self):
+        non_numerical_attributes = re.compile("(alpha|continent|is_neighbour_of|subregion|time_zone)", re.IGNORECASE)
         
-        numerical_attributes_query="""
-            SELECT DISTINCT ?property WHERE {
-                ?entity rdf:type ?class;
-                ?property ?value.
-                
-                # Solo entidades de Wikidata
-                FILTER(STRSTARTS(STR(?entity), STR(wd:)))
-                FILTER(STRSTARTS(STR(?property), STR(onto:)))
-                
-                FILTER NOT EXISTS{
-                    FILTER regex(str(?property), "classification$", "i")  # Exclude classifications.
-                }
+        countries = list()
+        alpha_rows = list()
+        numerical_attributes = set()
+        country_classifications = dict()
+        
+        for entity, entity_record in self.ontology_entities.items():
+            if entity_record["classifications"]:
+                country_classifications.setdefault("Q" + str(entity).split("Q")[-1], []).extend(entity_record["classifications"])
+            
+            if not entity_record["classes"]:
+                continue
+            
+            numerical_attributes.update(entity_record["properties"])
+            
+            for label in entity_record["labels"]:
+                countries.append((str(label), "Q" + str(entity).split("Q")[-1]))
                 
-                FILTER NOT EXISTS{
-                    FILTER regex(str(?property), "(alpha|continent|is_neighbour_of|subregion|time_zone)", "i")  # Exclude non-numeric values too, as they
-                                                                                                                # make no sense when analysing tendencies.
-                }
+                for alpha_code in entity_record["alpha_codes"]:
+                    for entity_class in entity_record["classes"]:
+                        alpha_rows.append((str(label), str(alpha_code), str(entity_class).split("/")[-1]))
+        
+        countries.sort(key=lambda row: row[0])
+        alpha_rows.sort(key=lambda row: row[0])
+        
+        self.country_classifications = country_classifications
+        self.countries_in_ontology = {country_name: country_uri for country_name, country_uri in countries}
+        self.alpha_codes = {country_name: (alpha_code, continent_class) for country_name, alpha_code, continent_class in alpha_rows}
+        self.numerical_attributes_list = sorted(str(attribute).split("/")[-1] for attribute in numerical_attributes
+                                                if not re.search("classification$", str(attribute), re.IGNORECASE)
+                                                and not non_numerical_attributes.search(str(attribute)))
+        
+        self.__init_dafo_table()
+    
+    def __init_dafo_table(self):
+        """
+        Splits the classifications of every country into strengths and weaknesses in a single pass, with the
+        dafo_polarities lookup table:
+        
+        - dafo_table: {Wikidata code: {"strengths": {classification property URI: value}, "weaknesses": {...}}}.
+        - dafo_countries: {(polarity, classification value): [Wikidata codes]}, for the world-level queries.
+        """
+        self.dafo_table = dict()
+        self.dafo_countries = dict()
+        
+        for country_wd_code in self.countries_in_ontology.values():
+            if country_wd_code in self.dafo_table:
+                continue
+            
+            country_dafo = {"strengths": dict(), "weaknesses": dict()}
+            
+            for propertyName, propertyValue in self.country_classifications.get(country_wd_code, []):
+                polarity = self.dafo_polarities.get(propertyValue)
                 
-            }
+                if polarity is not None:
+                    country_dafo[polarity][propertyName] = propertyValue
+            
+            for polarity in ["strengths", "weaknesses"]:
+                for propertyValue in set(country_dafo[polarity].values()):
+                    self.dafo_countries.setdefault((polarity, propertyValue), []).append(country_wd_code)
+            
+            self.dafo_table[country_wd_code] = country_dafo
+    
+    @property
+    def model(self):
+        """
+        Trained embedding model (PyKEEN pipeline result), loaded on first access.
+        It is None when the embeddings were read from the exported artefact instead.
+        """
+        self.__ensure_embeddings()
+        return self.__model
+    
+    def warm_up_embeddings(self, background=True):
+        """
+        Loads the embedding model (and its similarity index) before it is first needed.
+        
+        **Args"":
+        
+        -> background: whether to load it in a daemon thread, so that the caller is not blocked.
+        
+        **Returns"":
+        
+        -> The loading thread if background is True; None otherwise.
+        
+        """
+        if not background:
+            self.__ensure_embeddings()
+            return None
+        
+        loader = threading.Thread(target=self.__ensure_embeddings, name="mcow-embeddings-warm-up", daemon=True)
+        loader.start()
+        
+        return loader
+    
+    def __ensure_embeddings(self):
+        """
+        Loads the entity embeddings and builds the embedding index, only the first time it is called: from the
+        exported artefact if available (no torch needed), or else by importing torch and unpickling the trained model.
+        Concurrent callers wait for the first one to finish, instead of loading their own copy.
+        """
+        if self.embeddings_loaded:
+            return
+        
+        with self.embedding_lock:
+            if self.embeddings_loaded:
+                return
+            
+            start = time.perf_counter()
+            exported_embeddings = None
+            
+            if self.exported_embeddings_path is not None:
+                exported_embeddings = load_exported_embeddings(self.exported_embeddings_path, self.embedding_model_path)
+            
+            if exported_embeddings is not None:
+                embeddings, entity_to_id = exported_embeddings
+            else:
+                import torch    # Imported here, as pages that do not use embeddings should not pay for it
                 
-            ORDER BY ASC(?property)
-                    
-            """
-
-        self.numerical_attributes_list = list()
-        results = self.graph.query(numerical_attributes_query)
-
-        for row in results:
-            attribute = row.property.split("/")[-1]
-            self.numerical_attributes_list.append(attribute)
+                self.__model = torch.load(self.embedding_model_path, weights_only=False)
+                embeddings, entity_to_id = read_model_embeddings(self.__model)
+            
+            self.__init_embedding_index(embeddings, entity_to_id)
+            
+            self.embedding_load_time = time.perf_counter() - start
+            self.embeddings_loaded = True
+            print(f"Entity embeddings loaded from the {'trained model' if self.__model is not None else 'exported artefact'} in {self.embedding_load_time:.2f} seconds.")
+    
+    def __init_embedding_index(self, embeddings, entity_to_id, top_k=20):
+        """
+        Keeps the whole entity embedding table (a contiguous float32 array, possibly memory-mapped) alongside
+        with the L2 norm of each embedding, and precomputes the cosine similarity matrix amongst the countries
+        of the ontology, alongside with the top_k most similar entities of each one of them.
+        """
+        self.embedding_table = embeddings if isinstance(embeddings, np.memmap) else np.ascontiguousarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(self.embedding_table, axis=1)
+        self.embedding_norms = np.where(norms == 0, 1, norms).astype(np.float32)     # The table itself is not normalised, so that it can stay memory-mapped
         
-        print(f"MCOW ontology contains {len(self.numerical_attributes_list)} numerical attributes.")
+        self.entity_to_id = entity_to_id
+        self.id_to_entity = {v: k for k, v in entity_to_id.items()}
+        self.excluded_entity_ids = [entity_to_id[ent] for ent in ['type'] if ent in entity_to_id]     # Never returned as a similar country
+        
+        self.embedding_countries = [country for country in self.countries_in_ontology.values() if country in entity_to_id]
+        self.embedding_country_index = {country: i for i, country in enumerate(self.embedding_countries)}
+        country_ids = np.array([entity_to_id[country] for country in self.embedding_countries], dtype=np.int64)
+        
+        country_vectors = self.__gather_embeddings(country_ids) / self.embedding_norms[country_ids, None]
+        self.country_similarity_matrix = country_vectors @ country_vectors.T
+        self.country_neighbours, self.country_neighbours_similarity = self.__rank_similar_entities(country_ids, top_k)
+    
+    def __rank_similar_entities(self, entity_ids, top_k):
+        """
+        Returns, for each of the given model ids, the ids of its top_k most similar entities of the model
+        (itself excluded) and their cosine similarities, both sorted from the most similar to the least one.
+        """
+        similarities = (self.__gather_embeddings(entity_ids) @ self.embedding_table.T) / self.embedding_norms[entity_ids, None] / self.embedding_norms[None, :]
+        similarities[np.arange(len(entity_ids)), entity_ids] = -np.inf
+        similarities[:, self.excluded_entity_ids] = -np.inf
+        
+        top_k = min(top_k, similarities.shape[1] - 1 - len(self.excluded_entity_ids))
+        neighbours = np.argsort(-similarities, axis=1, kind="stable")[:, :top_k]
+        
+        return neighbours, np.take_along_axis(similarities, neighbours, axis=1)
     
     def get_countries_dict(self):
         return self.countries_in_ontology
@@ -354,6 +1150,110 @@ class MCOWAnalyser:
     def show_cache_keys(self):
         return self.cache.keys()
     
+    def cache_stats(self):
+        """
+        Returns the hit/miss/eviction counters of every cache namespace, alongside with the cache usage and limits,
+        and the counters of every kind of graph lookup ("lookups": calls, cache hits, errors, rows and time).
+        """
+        cache_stats = self.cache.stats()
+        cache_stats["lookups"] = self.query_instrumentation.stats()
+        
+        return cache_stats
+    
+    def apply_delta(self, triples_added=(), triples_removed=()):
+        """
+        Modifies the graph and updates the derived indexes and cached results of the affected countries only
+        (the country being the subject of a triple, or the one a modified <country-YEAR> sub-entity belongs to).
+        
+        Only the indexes and cache entries of those countries are refreshed: the country list, alpha codes and
+        numerical attributes, their temporal series and DAFO analysis, their tendency and similarity results, and the
+        similarities involving them in the pairwise similarity table (which are computed again, without being
+        stored, as the table keeps matching the ontology file). Every similarity is dropped if the class hierarchy
+        changed. Queries should not be run while the delta is being applied.
+        
+        **Args"":
+        
+        -> triples_added: iterable of (subject, predicate, object) rdflib triples to add to the graph.
+        
+        -> triples_removed: iterable of (subject, predicate, object) rdflib triples to remove from the graph.
+        
+        **Returns"":
+        
+        -> A dictionary with the amount of added and removed triples, the sorted Wikidata codes of the affected
+        countries and the amount of invalidated cache entries of each namespace.
+        
+        """
+        triples_added = list(triples_added)
+        triples_removed = list(triples_removed)
+        changed_triples = triples_added + triples_removed
+        wd_prefix = "http://www.wikidata.org/entity/"
+        
+        with self.delta_lock:
+            changed_subjects = set(subject for subject, _, _ in changed_triples)
+            affected_countries = self.__delta_affected_countries(changed_subjects, changed_triples)    # Before the change...
+            
+            for triple in triples_removed:
+                self.graph.remove(triple)
+            
+            for triple in triples_added:
+                self.graph.add(triple)
+            
+            affected_countries |= self.__delta_affected_countries(changed_subjects, changed_triples)   # ...and after it
+            
+            hierarchy_changed = any(predicate == RDFS.subClassOf and not str(subject).startswith(wd_prefix) and not str(value).startswith(wd_prefix)
+                                    for subject, predicate, value in changed_triples)
+            
+            self.__update_ontology_indexes([subject for subject in changed_subjects if str(subject).startswith(wd_prefix)])
+            self.temporal_series.update_countries(self.graph, affected_countries)
+            self.local_similarity_calculator.update_indexes(changed_triples, affected_countries)
+            
+            lowercase_countries = set(country.lower() for country in affected_countries)
+            invalidated = {
+                "tendency": self.cache.invalidate("tendency", lambda key: key.split("_")[0] in lowercase_countries),
+                "property_values": self.cache.invalidate("property_values", lambda key: key[0] in affected_countries),
+                "temporal_entity_data": self.cache.invalidate("temporal_entity_data", lambda key: key in affected_countries),
+            }
+            
+            for namespace in ["attribute_similarity", "attributes_similarity"]:
+                invalidated[namespace] = self.cache.invalidate(namespace, None if hierarchy_changed else
+                                                               lambda key: key[0] in affected_countries or key[1] in affected_countries)
+            
+            if hierarchy_changed:
+                self.stale_similarity_countries.update(self.countries_in_ontology.values())
+            else:
+                self.stale_similarity_countries.update(affected_countries)
+            
+            self.shutdown_parallel_executor()       # Forked workers hold a copy of the previous indexes
+        
+        print(f"Delta applied: {len(triples_added)} triples added, {len(triples_removed)} removed, "
+              f"{len(affected_countries)} countries affected, {sum(invalidated.values())} cached results invalidated.")
+        
+        return {"added": len(triples_added), "removed": len(triples_removed), "affected_countries": sorted(affected_countries),
+                "invalidated": invalidated}
+    
+    def __delta_affected_countries(self, subjects, changed_triples):
+        """
+        Returns the codes of the countries the given subjects belong to: Wikidata entities are countries themselves,
+        and the rest of the subjects belong to the countries they are rdfs:subClassOf (e.g. <country-YEAR>).
+        """
+        wd_prefix = "http://www.wikidata.org/entity/"
+        affected_countries = set()
+        
+        for subject in subjects:
+            if str(subject).startswith(wd_prefix):
+                affected_countries.add(str(subject)[len(wd_prefix):])
+                continue
+            
+            for parent in self.graph.objects(subject, RDFS.subClassOf):
+                if str(parent).startswith(wd_prefix):
+                    affected_countries.add(str(parent)[len(wd_prefix):])
+        
+        for subject, predicate, value in changed_triples:
+            if predicate == RDFS.subClassOf and str(value).startswith(wd_prefix):
+                affected_countries.add(str(value)[len(wd_prefix):])
+        
+        return affected_countries
+    
     def anaylse_country_values(self, country_wd_code, ratio_name, mode: Optional[str]="I"):
         """
         Calculates over the graph the countries having the desired property and following
@@ -388,101 +1288,165 @@ class MCOWAnalyser:
         
         operator = "<" if mode=="I" else ">"    # Increasing -> first value < second value // Decreasing -> first value > second value
         
-        dynamic_factor_condition = "(?propertyValueTwo/?propertyValueOne)*100) >= 90)" if operator == "<" else "(?propertyValueTwo/?propertyValueOne)*100) >= 110)"     # Adjust factor that allows non-strict
-                                                                                                                                                                        # increasing/decreasing analysis of attributes,
-                                                                                                                                                                        # as long as they also fulfill that the last and the
-                                                                                                                                                                        # first values of the series meet the initial criteria
+        factor_threshold = 90 if operator == "<" else 110   # Adjust factor that allows non-strict increasing/decreasing analysis
+                                                            # of attributes, as long as they also fulfill that the last and the
+                                                            # first values of the series meet the initial criteria
         
         cache_id = country_wd_code + "_" + ratio_name + "_" + mode
         cache_id = cache_id.lower()
         
-        if cache_id not in self.cache:      # Cache checking, just in case the result is already there
-
-            user_query = f"""
-                            SELECT DISTINCT (COUNT (DISTINCT ?temporalSubentityOne) AS ?totalFiltered) ?total ?propertyValueOne ?anyoOne ?propertyValueTwo ?anyoTwo WHERE {{
-
-                ?temporalSubentityOne rdfs:subClassOf wd:{country_wd_code};
-                                    onto:{ratio_name} ?propertyValueOne;
-                                    onto:year ?anyoOne.
-            
-                ?temporalSubentityTwo rdfs:subClassOf wd:{country_wd_code};
-                                    onto:{ratio_name} ?propertyValueTwo;
-                                    onto:year ?anyoTwo.
-
-                {{
-                    SELECT ?anyo (COUNT (DISTINCT ?temporalSubentity) AS ?total) WHERE {{
-                        ?temporalSubentity rdfs:subClassOf wd:{country_wd_code};
-                                        onto:{ratio_name} ?propertyValue;
-                                        onto:year ?anyo.
-                    }}
-                }}
-
-
-                FILTER(?anyoTwo > ?anyoOne && (?propertyValueOne {operator} ?propertyValueTwo || ({dynamic_factor_condition})
-            
-                FILTER NOT EXISTS {{
-                    ?temporalSubentityPrev rdfs:subClassOf wd:{country_wd_code};
-                                        onto:{ratio_name} ?propertyValuePrev;
-                                        onto:year ?anyoPrev.
-                    FILTER(?anyoPrev > ?anyoOne && ?anyoPrev < ?anyoTwo)  # Makes sure no year exists between the pair
-                }}
-            }}
-
-
-                """
-            
-            first_val = ""
-            last_val = ""
-            
-            first_value_query = f"""
-                SELECT DISTINCT ?propertyValue WHERE {{
-                    ?temporalSubentity rdfs:subClassOf wd:{country_wd_code};
-                    onto:{ratio_name} ?propertyValue;
-                    onto:year ?anyo.
-                }}
-            
-                ORDER BY ASC(?anyo)
-                LIMIT 1"""
-            
-            results = self.graph.query(first_value_query)
-            for row in results:
-                first_val = row.propertyValue
+        cached_result = self.cache.get("tendency", cache_id)
+        
+        if cached_result is None:      # Cache checking, just in case the result is already there
             
-            last_value_query = f"""
-                SELECT DISTINCT ?propertyValue WHERE {{
-                    ?temporalSubentity rdfs:subClassOf wd:{country_wd_code};
-                    onto:{ratio_name} ?propertyValue;
-                    onto:year ?anyo.
-                }}
+            years, values = self.temporal_series.get_series(country_wd_code, ratio_name)     # Year-sorted series of the attribute
             
-                ORDER BY DESC(?anyo)
-                LIMIT 1"""
+            if len(values) == 0:
+                return dict()
             
-            results = self.graph.query(last_value_query)
-            for row in results:
-                last_val = row.propertyValue
+            first_val = values[0]
+            last_val = values[-1]
             
             if (operator == "<" and first_val<last_val) or (operator == ">" and first_val>last_val):    # If, even with the factor adjustement corrections the original
                                                                                                         # criteria is met, the value is returned.
-                results = self.graph.query(user_query)
+                years, year_values = self.temporal_series.get_series(country_wd_code, ratio_name, all_values=True)
+                total_filtered = 0
                 
-                for row in results:
-                    result_dict = {"total":row.total, "totalFiltered":row.totalFiltered, "lastVal": last_val}
-                    self.cache[cache_id] = result_dict
-                    
-                    return result_dict   # Just a single result, returned inmediately
+                for values_one, values_two in zip(year_values[:-1], year_values[1:]):     # Each pair of consecutive years (any of their values may fulfill it)
+                    if any((operator == "<" and value_one < value_two) or (operator == ">" and value_one > value_two)
+                           or (value_one != 0 and (value_two/value_one)*100 >= factor_threshold)
+                           for value_one in values_one for value_two in values_two):
+                        total_filtered += 1
+                
+                result_dict = {"total":len(values), "totalFiltered":total_filtered, "lastVal": float(last_val)}
+                self.cache.put("tendency", cache_id, result_dict)
+                
+                return result_dict
             
             return dict()       # Else, an empty dictionary is returned, as the condition has not been met.
         
         else:   # Already processed query; better avoid executing it again
             
-            return self.cache[cache_id]
+            return cached_result
         
     
-    def analyse_graph_values(self, ratio_name, mode: Optional[str]="I"):
+    def __scan_tendency(self, ratio_name, mode):
         """
-        Calls "analyse_country_values" for each country in the graph, returning the WD code
-        and the country name of those who fulfill the request.
+        Runs the vectorised tendency test of an attribute over every country, with the same criteria
+        (and adjust factor) as "anaylse_country_values".
+        """
+        increasing = mode=="I"
+        factor_threshold = 90 if increasing else 110
+        
+        totals, totals_filtered, first_values, last_values = self.temporal_series.scan_tendency(ratio_name, increasing, factor_threshold)
+        
+        return {"increasing": increasing, "total": totals, "totalFiltered": totals_filtered, "firstVal": first_values,
+                "lastVal": last_values, "duplicated": self.temporal_series.get_duplicated_countries(ratio_name)}
+    
+    def __country_fulfills_tendency(self, country_id, ratio_name, mode, tendency_scan):
+        """
+        Returns the most recent value of the attribute if the country follows the tendency strictly, None otherwise.
+        """
+        if country_id in tendency_scan["duplicated"]:       # Years with several values need every combination checked, country by country
+            result = self.anaylse_country_values(country_id, ratio_name, mode)
+            
+        elif country_id in self.temporal_series.country_index:
+            i = self.temporal_series.country_index[country_id]
+            first_val = tendency_scan["firstVal"][i]
+            last_val = tendency_scan["lastVal"][i]
+            
+            if (tendency_scan["increasing"] and first_val<last_val) or (not tendency_scan["increasing"] and first_val>last_val):
+                result = {"total":tendency_scan["total"][i], "totalFiltered":tendency_scan["totalFiltered"][i], "lastVal": last_val}
+            else:
+                result = dict()
+        
+        else:
+            result = dict()
+
+        if "total" in result and "totalFiltered" in result and result["totalFiltered"]:
+            total = int(result["total"])
+            totalFiltered = int(result["totalFiltered"])
+            
+            if(totalFiltered==total-1):     # If the tendency is absolutely strict, the country fulfills it
+                return float(result["lastVal"])
+        
+        return None
+    
+    def _countries_fulfilling_tendency(self, country_ids, ratio_name, mode):
+        """
+        Runs "anaylse_country_values" for each one of the given countries, returning the pairs (country id, last value)
+        of those that follow the tendency strictly. It is the unit of work of the parallel mode of "analyse_graph_values".
+        """
+        fulfilling = list()
+        
+        for country_id in country_ids:
+            result = self.anaylse_country_values(country_id, ratio_name, mode)
+            
+            if "total" in result and "totalFiltered" in result and result["totalFiltered"]:
+                if int(result["totalFiltered"]) == int(result["total"]) - 1:
+                    fulfilling.append((country_id, float(result["lastVal"])))
+        
+        return fulfilling
+    
+    def __get_parallel_workers(self):
+        """
+        Returns the amount of workers of the parallel mode (one per CPU if the analyser was created without "parallel_workers").
+        """
+        return self.parallel_workers if self.parallel_workers is not None else (os.cpu_count() or 1)
+    
+    def __get_parallel_executor(self):
+        """
+        Creates the pool of workers the first time it is needed, and reuses it afterwards.
+        """
+        with self.parallel_executor_lock:
+            if self.parallel_executor is None:
+                if self.parallel_backend == "process" and "fork" in multiprocessing.get_all_start_methods():
+                    # The analyser is handed to the workers through the initializer, which fork inherits instead of pickling the graph
+                    self.parallel_executor = ProcessPoolExecutor(max_workers=self.__get_parallel_workers(), mp_context=multiprocessing.get_context("fork"),
+                                                                 initializer=_init_forked_worker, initargs=(self,))
+                else:
+                    if self.parallel_backend == "process":
+                        print("Process workers need the 'fork' start method, which is not available; using threads instead.")
+                    self.parallel_executor = ThreadPoolExecutor(max_workers=self.__get_parallel_workers(), thread_name_prefix="mcow-analyser")
+            
+            return self.parallel_executor
+    
+    def shutdown_parallel_executor(self):
+        """
+        Stops the workers of the parallel mode (a new pool is created if it is needed again).
+        """
+        with self.parallel_executor_lock:
+            if self.parallel_executor is not None:
+                self.parallel_executor.shutdown()
+                self.parallel_executor = None
+    
+    def __parallel_analyse_graph_values(self, ratio_name, mode):
+        """
+        Fans "anaylse_country_values" out to the pool of workers, in one chunk per worker, and merges
+        the results in the order of the countries of the ontology (so that it does not depend on the workers).
+        """
+        country_ids = list(self.countries_in_ontology.values())
+        chunk_size = -(-len(country_ids) // self.__get_parallel_workers())
+        chunks = [country_ids[i:i + chunk_size] for i in range(0, len(country_ids), chunk_size)]
+        
+        executor = self.__get_parallel_executor()
+        
+        if isinstance(executor, ProcessPoolExecutor):
+            futures = [executor.submit(_forked_countries_fulfilling_tendency, chunk, ratio_name, mode) for chunk in chunks]
+        else:
+            futures = [executor.submit(self._countries_fulfilling_tendency, chunk, ratio_name, mode) for chunk in chunks]
+        
+        last_values = dict()
+        for future in futures:
+            last_values.update(future.result())
+        
+        return {country_name: (country_id, last_values[country_id])
+                for country_name, country_id in self.countries_in_ontology.items() if country_id in last_values}
+    
+    def analyse_graph_values(self, ratio_name, mode: Optional[str]="I", parallel: Optional[bool]=None):
+        """
+        Evaluates the "analyse_country_values" tendency test for every country in the graph at once,
+        returning the WD code and the country name of those who fulfill the request.
         
         **Args"":
         
@@ -491,6 +1455,10 @@ class MCOWAnalyser:
         -> mode: how the aimed tendency should look like, "I" for strictly increasing and "D"
         for strictly decreasing.
         
+        -> parallel: whether to fan the countries out to the pool of workers of the analyser (by default,
+        only when it was created with more than one "parallel_workers"; without them, one worker per CPU is used).
+        It does not pay off with the countries of the ontology, so it is only worth it for much larger graphs.
+        
         **Returns"":
         
         -> A dictionary containing the Wikidata key and the name of the countries that
@@ -505,28 +1473,30 @@ class MCOWAnalyser:
         if ratio_name not in self.numerical_attributes_list:
             raise Exception("The introduced ratio is mispelled or does not belong to the ontology.")
         
+        if parallel is None:
+            parallel = self.parallel_workers is not None and self.parallel_workers > 1
+        
+        if parallel:
+            return self.__parallel_analyse_graph_values(ratio_name, mode)
+        
+        tendency_scan = self.__scan_tendency(ratio_name, mode)
         result_dict = dict()
 
         for country_name, country_id in self.countries_in_ontology.items():
-            result = self.anaylse_country_values(country_id, ratio_name, mode)
-
-            if "total" in result and "totalFiltered" in result and result["totalFiltered"]:
-                total = int(result["total"])
-                totalFiltered = int(result["totalFiltered"])
-                lastVal = float(result["lastVal"])
-                
-                if(totalFiltered==total-1):     # If the tendency is absolutely strict, the country is
-                                                # added to the returning dictionary.
-                    result_dict[country_name] = (country_id, lastVal)
+            lastVal = self.__country_fulfills_tendency(country_id, ratio_name, mode, tendency_scan)
+            
+            if lastVal is not None:
+                result_dict[country_name] = (country_id, lastVal)
 
         return result_dict
     
     
     def multi_analyse_graph_values(self, ratio_dict):
         """
-        Calls "analyse_country_values" for each country in the graph, returning the WD code
-        and the country name of those who fulfill each single request, and then doing set intersection
-        to return the countries that matches all of them.
+        Evaluates every criterion of the dictionary for each country in the graph in a single pass,
+        returning the WD code and the country name of those who fulfill all of them. Criteria are checked
+        from the most restrictive attribute (the one with less countries having a temporal series) to the least
+        one, so that a country is discarded as soon as one of them fails.
         
         **Args"":
         
@@ -536,40 +1506,42 @@ class MCOWAnalyser:
         **Returns"":
         
         -> A dictionary containing the Wikidata key and the name of the countries that
-        fulfill ALL the requirements (through set intersection).
+        fulfill ALL the requirements (alongside with the most recent value of the first one), and another
+        one with the most recent value of every requirement for each of those countries.
         
         """
         
-        res_dict = dict()
-        res_set = set()
-        res_values = dict()
-        
         for ratio, mode in ratio_dict.items():
             
+            if mode.lower() not in ["d", "i"]:
+                raise Exception("Please, introduce a valid mode (empty or 'I' for increasing values,"
+                                " 'D' for decreasing ones).")
+            
             if ratio not in self.numerical_attributes_list:
                 raise Exception("The introduced ratio is mispelled or does not belong to the ontology.")
+        
+        tendency_scans = {ratio: self.__scan_tendency(ratio, mode) for ratio, mode in ratio_dict.items()}
+        
+        ordered_criteria = sorted(ratio_dict.items(), key=lambda criterion: self.temporal_series.count_countries_with_series(criterion[0]))     # Most selective first
+        
+        res_dict = dict()
+        res_values_def = dict()
+        
+        for country_name, country_id in self.countries_in_ontology.items():
+            last_values = dict()
             
-            called_dict = self.analyse_graph_values(ratio, mode)
-            called_set = set([k for k,v in called_dict.items()])
-            
-            for k,v in called_dict.items():
-                if k not in res_values:
-                    res_values[k] = list()
-                res_values[k].append({ratio: v[1]})
-            
-            if len(res_dict) == 0:
-                res_dict = called_dict.copy()
-                res_set = called_set
-
-            else:
-                res_set = res_set.intersection(called_set)
-                res_dict = {k:v for k,v in res_dict.items() if k in res_set}
-                print(res_dict)
+            for ratio, mode in ordered_criteria:
+                lastVal = self.__country_fulfills_tendency(country_id, ratio, mode, tendency_scans[ratio])
+                
+                if lastVal is None:         # There is no need to keep on checking the rest of the criteria for this country
+                    break
+                
+                last_values[ratio] = lastVal
             
-            if(len(res_set)) == 0:      # If the set is already empty, it makes no sense to keep on iterating over the rest of the attributes
-                break
-        
-        res_values_def = {k:v for k,v in res_values.items() if k in res_set}
+            if ratio_dict and len(last_values) == len(ratio_dict):
+                first_ratio = next(iter(ratio_dict))
+                res_dict[country_name] = (country_id, last_values[first_ratio])
+                res_values_def[country_name] = [{ratio: last_values[ratio]} for ratio in ratio_dict]
         
         return (res_dict, res_values_def)
     
@@ -594,61 +1566,48 @@ class MCOWAnalyser:
         ).
         """
         
-        dafoQuery = f"""
+        if country_wd_code not in self.dafo_table:
+            raise Exception(f"The introduced country code '{country_wd_code}' is not a valid country code or does not belong to the current ontology.")
         
-        SELECT DISTINCT ?propertyName ?propertyValue WHERE {{
-          wd:{country_wd_code} ?propertyName ?propertyValue.
-          FILTER(STRENDS(STR(?propertyName), "classification"))
-        }}
+        return self.dafo_table[country_wd_code]     # Computed for every country at startup
+    
+    def getDAFOAnalysisTable(self):
         """
+        Returns the "getDAFOAnalysis" dictionary of every country of the ontology at once.
         
-        if country_wd_code not in self.countries_in_ontology.values():
-            raise Exception(f"The introduced country code '{country_wd_code}' is not a valid country code or does not belong to the current ontology.")
+        **Returns"":
         
-        cache_id = "dafo_" + country_wd_code
+        -> A dictionary whose keys are the Wikidata codes of the countries and whose values are their
+        "getDAFOAnalysis" dictionaries (e.g.: {"Q29": {"strengths": {...}, "weaknesses": {...}}, ...}).
         
-        if cache_id not in self.cache:
+        """
+        return self.dafo_table
+    
+    def getCountriesByDAFOFeature(self, classification_value, polarity: Optional[str]=None):
+        """
+        Returns the countries that have a given classification as one of their strengths or weaknesses
+        (e.g.: the countries with "high_inflation_rate" as a weakness).
         
-            concepts_set_one = ["natality", "rural_access", "urban_access"]     # Concepts that are better the highest possible
-            concepts_set_two = ["unscolarization", "unemployment_rate", "mortality", "inflation_rate", "debt"]   # Concepts that are better the lowest possible
-            strengths_list = ["age_balanced_population"]
-            weaknesses_list = ["extremely_elder_population", "majorly_elder_population", "extremely_underaged_population"]
-            
-            for concept in concepts_set_one:
-                strengths_list.append("high_" + concept)
-                strengths_list.append("very_high_" + concept)
-                weaknesses_list.append("low_" + concept)
-                weaknesses_list.append("very_low_" + concept)
-
-            for concept in concepts_set_two:
-                strengths_list.append("low_" + concept)
-                strengths_list.append("very_low_" + concept)
-                weaknesses_list.append("high_" + concept)
-                weaknesses_list.append("very_high_" + concept)
-                
-            result_strengths = dict()
-            result_weaknesses = dict()
-
-            results = self.graph.query(dafoQuery)
-            
-            for row in results:
-                propertyName = str(row.propertyName)
-                propertyValue = str(row.propertyValue)
-                
-                if propertyValue in strengths_list:
-                    result_strengths[propertyName] = propertyValue
-                    
-                elif propertyValue in weaknesses_list:
-                    result_weaknesses[propertyName] = propertyValue
-            
-            res_dict = {"strengths": result_strengths, "weaknesses": result_weaknesses}
-            
-            self.cache[cache_id] = res_dict
-            
-            return res_dict
+        **Args"":
+        
+        -> classification_value: the classification to look for (e.g.: "high_inflation_rate").
+        
+        -> polarity: "strengths" or "weaknesses" (by default, the one the classification belongs to).
+        
+        **Returns"":
+        
+        -> A dictionary containing the name and the Wikidata key of the countries with that classification.
+        
+        """
+        if polarity is None:
+            polarity = self.dafo_polarities.get(classification_value)
+        
+        if polarity not in ["strengths", "weaknesses"]:
+            raise Exception(f"The introduced classification '{classification_value}' is not analysed as a strength or a weakness.")
         
-        else:
-            return self.cache[cache_id]
+        country_ids = set(self.dafo_countries.get((polarity, classification_value), []))
+        
+        return {country_name: country_id for country_name, country_id in self.countries_in_ontology.items() if country_id in country_ids}
     
     
     def getAttributesSimilarity(self, country_one_wd_code, country_two_wd_code, attribute_set_chosen):
@@ -685,13 +1644,31 @@ class MCOWAnalyser:
             raise Exception("Please, introduce a valid mode ('D' for demographic, 'E' for economical,"
                             " 'S' for social or 'T' for territorial analysis).")
         
-        social_attributes = ["rural_sanitation_access", "urban_sanitation_access", "unemployment_rate", "youth_unscolarized_percentage"]
-        demographic_attributes = ["average_children", "life_expectancy", "mortality_rate", "natality_rate", "population", "population_growth_rate", "0_to_14_years", "15_to_64_years", "65_years_and_over"]
-        economic_attributes = ["economical_growth_rate", "inflation_rate", "public_debt_rate"]
-        territorial_attributes = ["area_int", "is_neighbour_of"]    # Still need continent, subregion and time_zone, but these will be evaluated through graph hierarchies
-        
         option = attribute_set_chosen.lower()
         
+        if self.__similarity_table_covers(country_one_wd_code, country_two_wd_code):
+            stored_similarity = self.__read_stored_similarity(country_one_wd_code, country_two_wd_code, option)
+            
+            if stored_similarity is not None:   # Already in the pairwise similarity table
+                return stored_similarity
+        
+        computed_similarity = self.cache.get_or_compute("attributes_similarity", self.cache.symmetric_key(country_one_wd_code, country_two_wd_code, option),
+                                                        lambda: self.__compute_attributes_similarity(country_one_wd_code, country_two_wd_code, option))
+        
+        if self.__similarity_table_covers(country_one_wd_code, country_two_wd_code):   # Lazy fill of the table
+            self.__store_similarity(country_one_wd_code, country_two_wd_code, option, computed_similarity)
+        
+        return computed_similarity
+    
+    def __compute_attributes_similarity(self, country_one_wd_code, country_two_wd_code, option):
+        """
+        Computes "getAttributesSimilarity" over the graph for an already validated pair of countries and (lowercase) option.
+        """
+        social_attributes = self.social_attributes
+        demographic_attributes = self.demographic_attributes
+        economic_attributes = self.economic_attributes
+        territorial_attributes = self.territorial_attributes
+        
         if option == "t":
             
             lcs, palmer_similarity = self.local_similarity_calculator.wu_palmer_similarity(country_one_wd_code, country_two_wd_code)
@@ -735,6 +1712,206 @@ class MCOWAnalyser:
                 computed_value /= selected_attrs
                 
             return {"total": computed_value, "values_dict": output_values}
+    
+    def getAttributesSimilarityToAll(self, country_wd_code, attribute_set_chosen):
+        """
+        Computes "getAttributesSimilarity" between a given country and every country of the ontology at once
+        (itself included), for the demographic (D), economical (E) or social (S) attribute sets.
+        
+        The attribute values of every country are read as a single matrix, and the min/max ratios (with the same
+        "-1 means the attribute is ignored" flag as the pairwise computation) are computed with NumPy masks.
+        
+        **Args"":
+        
+        -> country_wd_code: the Wikidata code of the country (e.g.: Spain -> Q29).
+        
+        -> attribute_set_chosen: code of the attributes to be analysed ("D", "E" or "S").
+        
+        **Returns"":
+        
+        -> A dictionary whose keys are the Wikidata codes of the countries and whose values are their
+        "getAttributesSimilarity" dictionaries with the given country.
+        
+        """
+        countries, totals, ratios, used = self.__one_vs_all_similarity(country_wd_code, attribute_set_chosen)
+        attributes = self.__similarity_attributes(attribute_set_chosen.lower())
+        
+        return {country: {"total": float(totals[i]), "values_dict": {attr: float(ratios[i, j]) for j, attr in enumerate(attributes) if used[i, j]}}
+                for i, country in enumerate(countries)}
+    
+    def __similarity_attributes(self, option):
+        return {"d": self.demographic_attributes, "e": self.economic_attributes, "s": self.social_attributes}[option]
+    
+    def __one_vs_all_similarity(self, country_wd_code, attribute_set_chosen):
+        """
+        Vectorised "getAttributesSimilarity" of a country against every country of the ontology.
+        
+        Returns the countries, their total similarities, the matrix of attribute ratios and the mask of the ratios taken into account.
+        """
+        if country_wd_code not in self.countries_in_ontology.values():
+            raise Exception(f"The introduced country code '{country_wd_code}' is not a valid country code or does not belong to the current ontology.")
+        
+        if attribute_set_chosen.lower() not in ["d", "e", "s"]:
+            raise Exception("Please, introduce a valid mode ('D' for demographic, 'E' for economical or 'S' for social analysis).")
+        
+        attributes = self.__similarity_attributes(attribute_set_chosen.lower())
+        countries = list(self.countries_in_ontology.values())
+        values, mask = self.temporal_series.get_current_matrix(countries, attributes)
+        own_values, own_mask = self.temporal_series.get_current_matrix([country_wd_code], attributes)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            highest = np.maximum(values, own_values)
+            ratios = np.minimum(values, own_values) / highest
+        
+        ratios[~(mask & own_mask) | (highest == 0)] = -1       # Missing attribute or both values 0: same flag as "attribute_similarity"
+        used = ratios != -1
+        
+        totals = np.zeros(len(countries))
+        for j in range(len(attributes)):        # Added attribute by attribute, in the same order as the pairwise computation
+            totals += np.where(used[:, j], ratios[:, j], 0.0)
+        
+        selected_attrs = used.sum(axis=1)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            totals = np.where(selected_attrs > 0, totals / selected_attrs, 0.0)
+        
+        totals[(selected_attrs == 0) & (np.array(countries) == country_wd_code)] = 1       # A country without any of the attributes, against itself
+        
+        return countries, totals, ratios, used
+    
+    def __similarity_channels(self):
+        """
+        Returns the channels of the pairwise similarity table: one per value returned by "getAttributesSimilarity" for each option.
+        """
+        channels = list()
+        
+        for option, attributes in [("d", self.demographic_attributes), ("e", self.economic_attributes), ("s", self.social_attributes)]:
+            channels += [option + "_total"] + [option + "_" + attr for attr in attributes]
+        
+        channels += ["t_total", "t_palmer_sim", "t_scalar", "t_jaccard", "t_lcs"]
+        
+        return channels
+    
+    def __similarity_table_covers(self, country_one_wd_code, country_two_wd_code):
+        """
+        Whether the pairwise similarity table holds (or may store) the similarities of a pair: both countries must be
+        in the table and not modified by "apply_delta" since it was opened.
+        """
+        if self.similarity_table is None:
+            return False
+        
+        return all(country in self.similarity_table.country_index and country not in self.stale_similarity_countries
+                   for country in [country_one_wd_code, country_two_wd_code])
+    
+    def __read_stored_similarity(self, country_one_wd_code, country_two_wd_code, option):
+        """
+        Rebuilds the "getAttributesSimilarity" dictionary of a pair from the pairwise similarity table, or returns None if it is not stored yet.
+        """
+        if option == "t":
+            row = self.similarity_table.get(country_one_wd_code, country_two_wd_code, ["t_total", "t_palmer_sim", "t_scalar", "t_jaccard", "t_lcs"])
+            
+            if row is None:
+                return None
+            
+            return {"total": float(row[0]), "palmer_sim": float(row[1]), "lcs": self.similarity_table.get_lcs_name(row[4]), "scalar": float(row[2]), "jaccard": float(row[3])}
+        
+        attributes = self.__similarity_attributes(option)
+        row = self.similarity_table.get(country_one_wd_code, country_two_wd_code, [option + "_total"] + [option + "_" + attr for attr in attributes])
+        
+        if row is None:
+            return None
+        
+        output_values = {attr: float(value) for attr, value in zip(attributes, row[1:]) if value != -1}    # -1 flags an ignored attribute
+        
+        return {"total": float(row[0]), "values_dict": output_values}
+    
+    def __store_similarity(self, country_one_wd_code, country_two_wd_code, option, similarity, flush=True):
+        """
+        Stores a "getAttributesSimilarity" dictionary of a pair in the pairwise similarity table.
+        """
+        if option == "t":
+            channel_values = {"t_total": similarity["total"], "t_palmer_sim": similarity["palmer_sim"], "t_scalar": similarity["scalar"],
+                              "t_jaccard": similarity["jaccard"], "t_lcs": self.similarity_table.get_lcs_id(similarity["lcs"])}
+        
+        else:
+            attributes = self.__similarity_attributes(option)
+            channel_values = {option + "_total": similarity["total"]}
+            
+            for attr in attributes:
+                channel_values[option + "_" + attr] = similarity["values_dict"].get(attr, -1)
+        
+        self.similarity_table.put(country_one_wd_code, country_two_wd_code, channel_values, flush=flush)
+    
+    def build_similarity_table(self):
+        """
+        Computes and stores in the pairwise similarity table the four similarities of every pair of countries
+        that are not stored yet (offline build step of the table).
+        """
+        if self.similarity_table is None:
+            raise Exception("The analyser was created without a pairwise similarity table.")
+        
+        countries = list(self.countries_in_ontology.values())
+        
+        for i, country_one in enumerate(countries):
+            for country_two in countries[i:]:
+                for option in ["d", "e", "s", "t"]:
+                    if self.__similarity_table_covers(country_one, country_two) and self.__read_stored_similarity(country_one, country_two, option) is None:
+                        similarity = self.__compute_attributes_similarity(country_one, country_two, option)
+                        self.__store_similarity(country_one, country_two, option, similarity, flush=False)
+            
+            self.similarity_table.flush()
+            print(f"Similarity table: {i+1}/{len(countries)} countries done.")
+    
+    def getMostSimilarCountries(self, country_wd_code, attribute_set_chosen, top_k: int = 5):
+        """
+        Returns the countries most similar to a given one by the chosen attribute set (see "getAttributesSimilarity").
+        The demographic, economical and social similarities are computed against every country at once (see
+        "getAttributesSimilarityToAll"), and the territorial ones are read from the pairwise similarity table (pairs
+        not stored yet are computed and stored first), or computed pair by pair when there is no table.
+        
+        **Args"":
+        
+        -> country_wd_code: the Wikidata code of the country (e.g.: Spain -> Q29).
+        
+        -> attribute_set_chosen: code of the attributes to be analysed ("D", "E", "S" or "T").
+        
+        -> top_k: the number of expected results.
+        
+        **Returns"":
+        
+        -> A list of pairs (country Wikidata code, total similarity), from the most similar country to the least one.
+        
+        """
+        if country_wd_code not in self.countries_in_ontology.values():
+            raise Exception(f"The introduced country code '{country_wd_code}' is not a valid country code or does not belong to the current ontology.")
+        
+        if attribute_set_chosen.lower() not in ["d", "e", "s", "t"]:
+            raise Exception("Please, introduce a valid mode ('D' for demographic, 'E' for economical,"
+                            " 'S' for social or 'T' for territorial analysis).")
+        
+        option = attribute_set_chosen.lower()
+        
+        if option in ["d", "e", "s"]:
+            countries, totals, _, _ = self.__one_vs_all_similarity(country_wd_code, option)
+            totals[countries.index(country_wd_code)] = -np.inf      # The country itself is not returned
+        
+        else:
+            computed_totals = {other_country: self.getAttributesSimilarity(country_wd_code, other_country, option)["total"]     # Fills the missing pairs
+                               for other_country in self.countries_in_ontology.values()}
+            
+            if (self.similarity_table is None or self.stale_similarity_countries
+                    or list(computed_totals) != self.similarity_table.meta["countries"]):
+                countries = list(computed_totals)       # No table, or modified by "apply_delta": not every pair is in it
+                totals = np.array(list(computed_totals.values()), dtype=np.float64)
+                totals[countries.index(country_wd_code)] = -np.inf
+            else:
+                countries = self.similarity_table.meta["countries"]
+                totals = np.array(self.similarity_table.get_column(country_wd_code, option + "_total"))
+                totals[self.similarity_table.country_index[country_wd_code]] = -np.inf      # The country itself is not returned
+        
+        ranking = np.argsort(-totals, kind="stable")[:top_k]
+        
+        return [(countries[i], float(totals[i])) for i in ranking]
         
     
     def getTemporalEntityData(self, country_wd_code):
@@ -754,48 +1931,8 @@ class MCOWAnalyser:
         if country_wd_code not in self.countries_in_ontology.values():
             raise Exception(f"The introduced country code '{country_wd_code}' is not a valid country code or does not belong to the current ontology.")
 
-        user_query = f"""
-                        SELECT ?temporalSubentity ?property ?propertyValue ?anyo WHERE {{
-
-                            ?temporalSubentity rdfs:subClassOf wd:{country_wd_code};
-                                            ?property ?propertyValue;
-                                            onto:year ?anyo.
-                                            
-                            FILTER(STRSTARTS(STR(?property), STR(onto:)))
-                            FILTER NOT EXISTS{{
-                                FILTER regex(str(?property), "year", "i")  # Exclude year values.
-                            }}
-                        }}
-
-
-                        """
-                        
-        res = self.graph.query(user_query)
-
-        temporal_entity_data_dict = dict()
-
-        for row in res:
-            prop = str(row.property).split("/")[-1]
-            year = int(row.anyo)
-            
-            prop_value = None
-            prop_value_str = str(row.propertyValue)
-            
-            if re.search("[0-9]+\.[0-9]+", prop_value_str):    # It is a float number
-                prop_value = float(prop_value_str)
-                
-            elif re.search("[0-9]+", prop_value_str):
-                prop_value = int(prop_value_str)
-            
-            else:
-                prop_value = prop_value_str
-                
-            if prop not in temporal_entity_data_dict:
-                temporal_entity_data_dict[prop]= list()
-
-            temporal_entity_data_dict[prop].append((year, prop_value))
-            
-        return temporal_entity_data_dict
+        return self.cache.get_or_compute("temporal_entity_data", country_wd_code,
+                                         lambda: self.temporal_series.get_country_data(country_wd_code))     # Year-sorted pairs, read from the columnar index
     
     
     def get_entity_embedding(self, entity_name: str, entity_to_id: Dict) -> np.ndarray:
@@ -812,15 +1949,40 @@ class MCOWAnalyser:
         
         -> A numpy array representing the embedding form of the entity.
         """
-        if entity_name not in entity_to_id:
-            raise ValueError(f"Entidad '{entity_name}' no encontrada en el grafo")
-
-        entity_id = entity_to_id[entity_name]
-        embedding = self.model.model.entity_representations[0](
-            torch.tensor([entity_id])
-        ).detach().numpy()[0]
-
-        return embedding
+        return self.get_entity_embeddings([entity_name], entity_to_id)[0]
+    
+    def get_entity_embeddings(self, entity_names: List[str], entity_to_id: Optional[Dict]=None) -> np.ndarray:
+        """
+        Given a list of graph entities, returns their embedding forms at once, with a single indexed
+        gather over the embedding table (instead of a forward call of the model per entity).
+        
+        **Args"":
+        
+        -> entity_names: a list of graph entities, e.g. Wikidata codes of countries (e.g.: Spain -> Q29).
+        
+        -> entity_to_id: a dictionary containing the internal id of the entities in the trained model
+        (by default, the one of the loaded embeddings).
+        
+        **Returns"":
+        
+        -> A float32 numpy array shaped (number of entities, embedding dimensions), in the same order as entity_names.
+        """
+        self.__ensure_embeddings()
+        
+        if entity_to_id is None:
+            entity_to_id = self.entity_to_id
+        
+        for entity_name in entity_names:
+            if entity_name not in entity_to_id:
+                raise ValueError(f"Entidad '{entity_name}' no encontrada en el grafo")
+        
+        return self.__gather_embeddings(np.array([entity_to_id[entity_name] for entity_name in entity_names], dtype=np.int64))
+    
+    def __gather_embeddings(self, entity_ids):
+        """
+        Returns the rows of the embedding table of the given model ids, as a new (not memory-mapped) array.
+        """
+        return np.asarray(self.embedding_table[entity_ids])
 
     def calculate_countries_similarity(self, countries):
         """
@@ -836,10 +1998,9 @@ class MCOWAnalyser:
         and their embeddings.
 
         """
-        entity_to_id = self.model.training.entity_to_id
+        self.__ensure_embeddings()
+        entity_to_id = self.entity_to_id
 
-        # Get countries embeddings
-        embeddings = []
         valid_countries = []
 
         for country in countries:
@@ -847,17 +2008,16 @@ class MCOWAnalyser:
             if country not in self.countries_in_ontology.values():
                 raise Exception(f"The introduced country code '{country}' is not a valid country code or does not belong to the current ontology.")
             
-            try:
-                emb = self.get_entity_embedding(country, entity_to_id)
-                embeddings.append(emb)
-                valid_countries.append(country)
-            except ValueError as e:
-                print(f"⚠ {e}")
-
-        embeddings = np.array(embeddings)
+            if country not in self.embedding_country_index:
+                print(f"⚠ Entidad '{country}' no encontrada en el grafo")
+                continue
+            
+            valid_countries.append(country)
 
-        # Calculate cosine similarity
-        sim_matrix = cosine_similarity(embeddings)
+        # Read the precomputed cosine similarities and the embeddings of the valid countries
+        positions = [self.embedding_country_index[country] for country in valid_countries]
+        sim_matrix = self.country_similarity_matrix[np.ix_(positions, positions)]
+        embeddings = self.get_entity_embeddings(valid_countries, entity_to_id)
 
         # Mostrar resultados
         print(f"\nSimilarity (cosine) matrix amongst {len(valid_countries)} countries:\n")
@@ -889,37 +2049,289 @@ class MCOWAnalyser:
         -> The k most similar countries to the one introduced.
         
         """
-        entity_to_id = self.model.training.entity_to_id
-        id_to_entity = {v: k for k, v in entity_to_id.items()}
+        self.__ensure_embeddings()
+        entity_to_id = self.entity_to_id
 
-        # Obtener todas los países del grafo
-        all_countries = [ent for ent in entity_to_id.keys()
-                        if ent not in ['type']]
-
-        # Obtener embedding de el país query
-        try:
-            query_emb = self.get_entity_embedding(query_country, entity_to_id)
-        except ValueError as e:
-            print(f"Error: {e}")
+        if query_country not in entity_to_id:
+            print(f"Error: Entidad '{query_country}' no encontrada en el grafo")
             return
 
-        # Calculate similarity amongst all the countries in the model
-        similarities = []
-        for country in all_countries:
-            if country != query_country:
-                try:
-                    emb = self.get_entity_embedding(country, entity_to_id)
-                    sim = cosine_similarity([query_emb], [emb])[0][0]
-                    similarities.append((country, sim))
-                except:
-                    pass
+        # Countries of the ontology have their neighbours precomputed; any other entity is ranked on demand
+        if query_country in self.embedding_country_index and top_k <= self.country_neighbours.shape[1]:
+            position = self.embedding_country_index[query_country]
+            neighbours = self.country_neighbours[position]
+            neighbours_similarity = self.country_neighbours_similarity[position]
+        else:
+            neighbours, neighbours_similarity = self.__rank_similar_entities(np.array([entity_to_id[query_country]]), top_k)
+            neighbours = neighbours[0]
+            neighbours_similarity = neighbours_similarity[0]
 
-        # Order by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        similarities = [(self.id_to_entity[int(entity_id)], float(sim)) for entity_id, sim in zip(neighbours[:top_k], neighbours_similarity[:top_k])]
 
         print(f"\n{'=' * 70}")
         print(f"Top {top_k} countries similar to '{query_country}':")
         print(f"{'=' * 70}")
         for i, (country, sim) in enumerate(similarities[:top_k], 1):
             print(f"{i}. {country:20} (similarity: {sim:.4f})")
-            
\ No newline at end of file
+        
+        return similarities
+    
+    async def __run_async(self, method, *args, **kwargs):
+        """
+        Runs a (blocking) analyser method in a worker thread, so that the caller's event loop keeps serving other
+        tasks meanwhile. The analyser work is CPU-bound and holds the GIL, so the "async" methods only keep
+        the event loop responsive: they are not faster than the blocking ones, nor when awaited concurrently.
+        """
+        return await asyncio.to_thread(method, *args, **kwargs)
+    
+    async def aget_attributes_similarity(self, country_one_wd_code, country_two_wd_code, attribute_set_chosen):
+        """
+        Awaitable version of "getAttributesSimilarity".
+        """
+        return await self.__run_async(self.getAttributesSimilarity, country_one_wd_code, country_two_wd_code, attribute_set_chosen)
+    
+    async def aget_all_attributes_similarity(self, country_one_wd_code, country_two_wd_code, attribute_sets=("d", "e", "s", "t")):
+        """
+        Computes "getAttributesSimilarity" of every given attribute set, in a single call off the event loop.
+        
+        **Args"":
+        
+        -> country_one_wd_code: the Wikidata code of the first country (e.g.: Spain -> Q29).
+        
+        -> country_two_wd_code: the Wikidata code of the second country.
+        
+        -> attribute_sets: the attribute sets to compare ('D', 'E', 'S' and/or 'T').
+        
+        **Returns"":
+        
+        -> A dictionary whose keys are the attribute sets and whose values are their "getAttributesSimilarity" results.
+        
+        """
+        return await self.__run_async(lambda: {attribute_set: self.getAttributesSimilarity(country_one_wd_code, country_two_wd_code, attribute_set)
+                                               for attribute_set in attribute_sets})
+    
+    async def aanalyse_graph_values(self, ratio_name, mode: Optional[str]="I"):
+        """
+        Awaitable version of "analyse_graph_values".
+        """
+        return await self.__run_async(self.analyse_graph_values, ratio_name, mode)
+    
+    async def amulti_analyse_graph_values(self, ratio_dict):
+        """
+        Awaitable version of "multi_analyse_graph_values".
+        """
+        return await self.__run_async(self.multi_analyse_graph_values, ratio_dict)
+    
+    async def aget_dafo_analysis(self, country_wd_code):
+        """
+        Awaitable version of "getDAFOAnalysis".
+        """
+        return await self.__run_async(self.getDAFOAnalysis, country_wd_code)
+    
+    async def aget_temporal_entity_data(self, country_wd_code):
+        """
+        Awaitable version of "getTemporalEntityData".
+        """
+        return await self.__run_async(self.getTemporalEntityData, country_wd_code)
+    
+    async def acalculate_countries_similarity(self, countries):
+        """
+        Awaitable version of "calculate_countries_similarity".
+        """
+        return await self.__run_async(self.calculate_countries_similarity, countries)
+
+
+_forked_analyser = None     # Only set inside the process workers of the parallel mode, by "_init_forked_worker"
+
+def _init_forked_worker(analyser):
+    """
+    Keeps the analyser a forked worker was started with, giving it its own results cache: a lock of
+    the parent cache could have been held by another of its threads at the time of the fork.
+    """
+    global _forked_analyser
+    analyser.cache = ResultsCache()
+    _forked_analyser = analyser
+
+def _forked_countries_fulfilling_tendency(country_ids, ratio_name, mode):
+    return _forked_analyser._countries_fulfilling_tendency(country_ids, ratio_name, mode)
+
+
+similarity_table_suffix = ".similarity.npy"
+embeddings_suffix = ".embeddings.npy"
+_shared_analysers = dict()
+_shared_analysers_lock = threading.Lock()
+
+def get_shared_analyser(filename="country_details_ontology_mejorada.ttl", folder="./impl/data/", format="turtle", warm_embeddings=False, slow_query_threshold=None):
+    """
+    Returns the process-wide MCOWAnalyser of the given ontology, building it only the first
+    time it is requested. Every Streamlit session shares the same (read-only) graph, embedding
+    model and results caches, instead of building its own analyser.
+    
+    **Args"":
+    
+    -> filename: name of the ontology file.
+    
+    -> folder: folder where the ontology file is stored.
+    
+    -> format: RDF serialization format of the file.
+    
+    -> warm_embeddings: whether to load the embedding model in the background once the analyser is built.
+    
+    -> slow_query_threshold: seconds from which a graph lookup is logged as a slow one (None to disable).
+    
+    **Returns"":
+    
+    -> The shared MCOWAnalyser instance for that ontology.
+    
+    """
+    file_path = os.path.abspath(os.path.join(folder, filename))
+    registry_key = (file_path, format)
+    
+    with _shared_analysers_lock:    # Concurrent sessions wait for the first one to build it, instead of building their own
+        if registry_key not in _shared_analysers:
+            graph = sbc.load(filename=filename, folder=folder, format=format)
+            _shared_analysers[registry_key] = MCOWAnalyser(graph, similarity_table_path=file_path + similarity_table_suffix,
+                                                           source_hash=sbc.get_file_hash(file_path), warm_embeddings=warm_embeddings,
+                                                           slow_query_threshold=slow_query_threshold)
+        
+        return _shared_analysers[registry_key]
+
+
+def get_exported_embeddings_path(model_path):
+    """
+    Path of the embeddings artefact exported from a trained model (e.g.: trained_embeddings_model.embeddings.npy).
+    Its id map is stored next to it, with an extra ".json" extension.
+    """
+    return os.path.splitext(model_path)[0] + embeddings_suffix
+
+
+def read_model_embeddings(model):
+    """
+    Reads the whole entity embedding table of a trained PyKEEN model.
+    
+    **Args"":
+    
+    -> model: the trained model (PyKEEN pipeline result).
+    
+    **Returns"":
+    
+    -> A pair with the (entities x dimensions) float32 embedding table and the entity_to_id dictionary.
+    
+    """
+    import torch
+    
+    with torch.inference_mode():     # A single gather of every entity, without autograd tracking
+        embeddings = model.model.entity_representations[0](indices=None).detach().cpu().numpy()
+    
+    return np.ascontiguousarray(embeddings, dtype=np.float32), model.training.entity_to_id
+
+
+def export_embeddings(model_path="./impl/trained_embeddings_model.pt", output_path=None):
+    """
+    Exports the entity embeddings of a trained model as a raw float32 .npy file, alongside with a JSON id map
+    (the list of entities ordered by their id), so that the application can memory-map them without torch.
+    
+    **Args"":
+    
+    -> model_path: path of the trained model.
+    
+    -> output_path: path of the exported .npy file (by default, next to the model).
+    
+    **Returns"":
+    
+    -> The path of the exported .npy file.
+    
+    """
+    import torch
+    
+    if output_path is None:
+        output_path = get_exported_embeddings_path(model_path)
+    
+    embeddings, entity_to_id = read_model_embeddings(torch.load(model_path, weights_only=False))
+    
+    entities = [None] * len(embeddings)
+    for entity, entity_id in entity_to_id.items():
+        entities[entity_id] = entity
+    
+    meta = {"source_hash": sbc.get_file_hash(model_path), "shape": list(embeddings.shape), "dtype": "float32", "entities": entities}
+    
+    tmp_path = output_path + ".tmp"     # Atomic writes, in case the application is reading the previous artefact
+    with open(tmp_path, "wb") as f:
+        np.save(f, embeddings)
+    os.replace(tmp_path, output_path)
+    
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, output_path + ".json")
+    
+    print(f"{embeddings.shape[0]} entity embeddings exported to {output_path}.")
+    
+    return output_path
+
+
+def load_exported_embeddings(embeddings_path, model_path=None):
+    """
+    Memory-maps an embeddings artefact written by "export_embeddings" (torch is not needed).
+    
+    **Args"":
+    
+    -> embeddings_path: path of the exported .npy file.
+    
+    -> model_path: path of the trained model it was exported from; if that file exists, the artefact
+    is only used when it was exported from its current version.
+    
+    **Returns"":
+    
+    -> A pair with the read-only memory-mapped embedding table and the entity_to_id dictionary, or None if the
+    artefact does not exist or is outdated.
+    
+    """
+    meta_path = embeddings_path + ".json"
+    
+    if not os.path.exists(embeddings_path) or not os.path.exists(meta_path):
+        return None
+    
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        
+        if model_path is not None and os.path.exists(model_path) and meta.get("source_hash") != sbc.get_file_hash(model_path):
+            print(f"Exported embeddings {embeddings_path} are outdated; the trained model will be loaded instead.")
+            return None
+        
+        embeddings = np.load(embeddings_path, mmap_mode="r")
+        
+        if list(embeddings.shape) != meta["shape"] or embeddings.dtype != np.float32:
+            print(f"Exported embeddings {embeddings_path} do not match their id map; the trained model will be loaded instead.")
+            return None
+        
+    except Exception as e:
+        print(f"Error reading exported embeddings {embeddings_path}: {e}")
+        return None
+    
+    entity_to_id = {entity: entity_id for entity_id, entity in enumerate(meta["entities"]) if entity is not None}
+    
+    return embeddings, entity_to_id
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="MCOW analyser offline tasks (run from the project root).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    build_parser = subparsers.add_parser("build-similarity-table", help="Computes the pairwise similarity table of every pair of countries.")
+    build_parser.add_argument("--folder", default="./impl/data/")
+    build_parser.add_argument("--filename", default="country_details_ontology_mejorada.ttl")
+    
+    export_parser = subparsers.add_parser("export-embeddings", help="Exports the entity embeddings of the trained model as a .npy file plus a JSON id map.")
+    export_parser.add_argument("--model", default="./impl/trained_embeddings_model.pt")
+    export_parser.add_argument("--output", default=None)
+    
+    args = parser.parse_args()
+    
+    if args.command == "build-similarity-table":
+        get_shared_analyser(filename=args.filename, folder=args.folder).build_similarity_table()
+    
+    elif args.command == "export-embeddings":
+        export_embeddings(model_path=args.model, output_path=args.output)
@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import deque, defaultdict
+
+
+_missing = object()
+
+
+def count_rows(result):
+    """
+    Default amount of rows of a lookup result: its length if it has one, else 1 (0 for None).
+    """
+    if result is None:
+        return 0
+
+    try:
+        return len(result)
+    except TypeError:
+        return 1
+
+
+class QueryInstrumentation:
+    """
+    Instrumentation of the graph lookups of the MCOW analyser (property values, Wu-Palmer similarities and
+    the temporal series store reads), which are what every page action is answered with.
+
+    Each lookup is run through "execute", which optionally looks for its result in a ResultsCache, times it and
+    builds a record with its template name, parameters, execution time, row count, cache hit and error. The record
+    is aggregated into per-template counters (see "stats") and passed to the registered hooks (e.g. QueryLogger,
+    QueryRingBuffer or QueryCounters). Lookups slower than slow_query_threshold are logged with their parameters.
+    """
+
+    def __init__(self, slow_query_threshold=None, hooks=None, log=print):
+        """
+        Args:
+            slow_query_threshold: seconds from which a lookup is considered slow and logged (None to disable)
+            hooks: callables that receive the record of every lookup
+            log: function used to log the slow lookups
+        """
+        self.slow_query_threshold = slow_query_threshold
+        self.hooks = list(hooks) if hooks is not None else list()
+        self.log = log
+        self.counters = QueryCounters()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def execute(self, template_name, parameters, compute, cache=None, namespace=None, key=None, rows=count_rows):
+        """
+        Runs a graph lookup, recording it.
+
+        Args:
+            template_name: name identifying the lookup (e.g. "calculator.property_values"), used to group the records
+            parameters: dictionary of the values the lookup was called with, stored in the record
+            compute: callable that performs the lookup
+            cache: optional ResultsCache where the result is looked for (and stored) under namespace and key
+            namespace: cache namespace of the lookup
+            key: cache key of the lookup
+            rows: callable that returns the amount of rows of a result
+
+        Returns:
+            The result of the lookup.
+        """
+        record = {"template": template_name, "parameters": parameters, "timestamp": time.time(),
+                  "execution_time": 0.0, "total_time": 0.0, "rows": 0, "cache_hit": False, "error": None}
+        start = time.perf_counter()
+
+        if cache is not None:
+            result = cache.get(namespace, key, _missing)
+
+            if result is not _missing:
+                record["cache_hit"] = True
+                record["rows"] = rows(result)
+                record["total_time"] = time.perf_counter() - start
+                self.__notify(record)
+                return result
+
+        phase_start = time.perf_counter()
+
+        try:
+            result = compute()
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            record["total_time"] = time.perf_counter() - start
+            self.__notify(record)
+            raise
+
+        record["execution_time"] = time.perf_counter() - phase_start
+
+        if cache is not None:
+            cache.put(namespace, key, result)
+
+        record["rows"] = rows(result)
+        record["total_time"] = time.perf_counter() - start
+        self.__notify(record)
+
+        return result
+
+    def stats(self):
+        """
+        Returns the counters of every lookup template.
+        """
+        return self.counters.snapshot()
+
+    def __notify(self, record):
+        self.counters(record)
+
+        if self.slow_query_threshold is not None and not record["cache_hit"] and record["total_time"] >= self.slow_query_threshold:
+            self.log(f"Slow graph lookup '{record['template']}' ({record['total_time']:.3f} s, {record['rows']} rows, "
+                     f"parameters {record['parameters']})")
+
+        for hook in self.hooks:
+            try:
+                hook(record)
+            except Exception as e:      # A failing hook must never break the lookup
+                print(f"Error in query hook {hook}: {e}")
+
+
+class QueryLogger:
+    """
+    Hook that logs one line per graph lookup.
+    """
+
+    def __init__(self, log=print, include_cache_hits=True):
+        self.log = log
+        self.include_cache_hits = include_cache_hits
+
+    def __call__(self, record):
+        if record["cache_hit"] and not self.include_cache_hits:
+            return
+
+        status = "cache hit" if record["cache_hit"] else f"execution {record['execution_time'] * 1000:.3f} ms"
+        error = f", error: {record['error']}" if record["error"] else ""
+
+        self.log(f"[graph] {record['template']} {record['parameters']}: {record['rows']} rows in "
+                 f"{record['total_time'] * 1000:.3f} ms ({status}){error}")
+
+
+class QueryRingBuffer:
+    """
+    Hook that keeps the records of the last max_records lookups in memory.
+    """
+
+    def __init__(self, max_records=1000):
+        self.buffer = deque(maxlen=max_records)
+
+    def __call__(self, record):
+        self.buffer.append(record)
+
+    def records(self, template_name=None):
+        """
+        Returns the stored records (of a single template if given), from the oldest to the newest one.
+        """
+        return [record for record in list(self.buffer) if template_name is None or record["template"] == template_name]
+
+    def clear(self):
+        self.buffer.clear()
+
+
+class QueryCounters:
+    """
+    Hook that aggregates Prometheus-style counters and a latency histogram per lookup template.
+    """
+
+    default_buckets = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, float("inf"))
+
+    def __init__(self, buckets=default_buckets, prefix="mcow_graph_lookup"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = defaultdict(lambda: {"queries_total": 0, "cache_hits_total": 0, "errors_total": 0, "rows_total": 0,
+                                             "seconds_sum": 0.0, "buckets": [0] * len(self.buckets)})
+
+    def __call__(self, record):
+        with self.lock:
+            counters = self.counters[record["template"]]
+            counters["queries_total"] += 1
+            counters["cache_hits_total"] += record["cache_hit"]
+            counters["errors_total"] += record["error"] is not None
+            counters["rows_total"] += record["rows"]
+            counters["seconds_sum"] += record["total_time"]
+
+            for i, bound in enumerate(self.buckets):
+                if record["total_time"] <= bound:
+                    counters["buckets"][i] += 1
+
+    def snapshot(self):
+        """
+        Returns a copy of the counters of every template.
+        """
+        with self.lock:
+            return {template: {name: list(value) if isinstance(value, list) else value for name, value in counters.items()}
+                    for template, counters in self.counters.items()}
+
+    def render(self):
+        """
+        Returns the counters in the Prometheus text exposition format.
+        """
+        lines = list()
+        counters = self.snapshot()
+
+        for name in ["queries_total", "cache_hits_total", "errors_total", "rows_total"]:
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            for template, values in counters.items():
+                lines.append(f'{self.prefix}_{name}{{template="{template}"}} {values[name]}')
+
+        lines.append(f"# TYPE {self.prefix}_seconds histogram")
+        for template, values in counters.items():
+            for bound, count in zip(self.buckets, values["buckets"]):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.prefix}_seconds_bucket{{template="{template}",le="{le}"}} {count}')
+            lines.append(f'{self.prefix}_seconds_sum{{template="{template}"}} {values["seconds_sum"]}')
+            lines.append(f'{self.prefix}_seconds_count{{template="{template}"}} {values["queries_total"]}')
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,167 @@
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+_missing = object()
+
+
+class ResultsCache:
+    """
+    Bounded, thread-safe LRU cache shared by the MCOW analyser components.
+
+    Entries are grouped in namespaces (e.g. "tendency", "property_values", "attribute_similarity"), each one with its own
+    hit/miss/eviction counters, but they all share the same capacity: once the amount of entries or
+    their (estimated) size in bytes exceeds the limits, the least recently used entries are evicted.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_entries: maximum amount of entries kept (None for no limit)
+            max_bytes: maximum estimated size of the cached values, in bytes (None for no limit)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()    # (namespace, key) -> (value, size), from the least to the most recently used
+        self.total_bytes = 0
+        self.counters = dict()
+
+    @staticmethod
+    def normalise_key(key):
+        """
+        Normalises a cache key: strings are stripped and their whitespace collapsed (so that the same SPARQL
+        query written with different indentation shares the entry), and lists are turned into tuples.
+        """
+        if isinstance(key, str):
+            return " ".join(key.split())
+
+        if isinstance(key, (list, tuple)):
+            return tuple(ResultsCache.normalise_key(k) for k in key)
+
+        return key
+
+    @staticmethod
+    def symmetric_key(first, second, *rest):
+        """
+        Key for pairwise (symmetric) methods: the pair is sorted, so that (A, B) and (B, A) share the same entry.
+        """
+        return tuple(sorted((first, second))) + rest
+
+    def get_or_compute(self, namespace, key, compute):
+        """
+        Returns the cached value, or computes it (outside the lock, so slow computations do not block
+        other readers) and caches it.
+        """
+        value = self.get(namespace, key, _missing)
+
+        if value is _missing:
+            value = compute()
+            self.put(namespace, key, value)
+
+        return value
+
+    def __get_counters(self, namespace):
+        if namespace not in self.counters:
+            self.counters[namespace] = {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "bytes": 0}
+
+        return self.counters[namespace]
+
+    def get(self, namespace, key, default=None):
+        """
+        Returns the cached value (marking it as the most recently used one) or default if it is not cached.
+        """
+        entry_key = (namespace, self.normalise_key(key))
+
+        with self.lock:
+            counters = self.__get_counters(namespace)
+
+            if entry_key not in self.entries:
+                counters["misses"] += 1
+                return default
+
+            counters["hits"] += 1
+            self.entries.move_to_end(entry_key)
+
+            return self.entries[entry_key][0]
+
+    def put(self, namespace, key, value):
+        """
+        Caches a value, evicting the least recently used entries if the capacity is exceeded.
+        """
+        entry_key = (namespace, self.normalise_key(key))
+        size = estimate_size(value)
+
+        with self.lock:
+            if entry_key in self.entries:
+                self.__remove(entry_key)
+
+            self.entries[entry_key] = (value, size)
+            self.total_bytes += size
+            counters = self.__get_counters(namespace)
+            counters["entries"] += 1
+            counters["bytes"] += size
+
+            while self.entries and ((self.max_entries is not None and len(self.entries) > self.max_entries)
+                                    or (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+                evicted_key = next(iter(self.entries))
+                self.__remove(evicted_key)
+                self.__get_counters(evicted_key[0])["evictions"] += 1
+
+    def __remove(self, entry_key):
+        value, size = self.entries.pop(entry_key)
+        self.total_bytes -= size
+        counters = self.__get_counters(entry_key[0])
+        counters["entries"] -= 1
+        counters["bytes"] -= size
+
+    def invalidate(self, namespace=None, predicate=None):
+        """
+        Removes the entries of a namespace (every namespace if None) whose key fulfills the predicate (every key if None).
+
+        Returns the amount of removed entries.
+        """
+        with self.lock:
+            removed_keys = [entry_key for entry_key in self.entries
+                            if (namespace is None or entry_key[0] == namespace) and (predicate is None or predicate(entry_key[1]))]
+
+            for entry_key in removed_keys:
+                self.__remove(entry_key)
+
+            return len(removed_keys)
+
+    def keys(self, namespace=None):
+        """
+        Returns the cached keys (of a single namespace if given), from the least to the most recently used.
+        """
+        with self.lock:
+            return [key for entry_namespace, key in self.entries if namespace is None or entry_namespace == namespace]
+
+    def stats(self):
+        """
+        Returns the counters of every namespace, alongside with the total usage and the limits of the cache.
+        """
+        with self.lock:
+            return {"namespaces": {namespace: dict(counters) for namespace, counters in self.counters.items()},
+                    "entries": len(self.entries), "bytes": self.total_bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+
+def estimate_size(value):
+    """
+    Rough estimation of the memory used by a cached value (containers are measured recursively).
+    """
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + value.nbytes
+
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v) for v in value)
+
+    return size
@@ -3,28 +3,323 @@ from pyvis.network import Network
 import networkx as nx
 import os
 from rdflib import Graph, Namespace, URIRef, Literal, RDF, RDFS, OWL
+import rdflib
 import webbrowser
+import hashlib
+import pickle
+import csv
+import json
+import re
+import time
+import argparse
+import pathlib
 data_path = "data"
+snapshot_suffix = ".snapshot"
+WD = Namespace("http://www.wikidata.org/entity/")
+ONTO = Namespace("http://www.detalle-pais.es/ontology/")
+indicator_missing_values = {"", "..", "na", "n/a", "nan", "null", "none"}    # Marcas de dato ausente habituales (p. ej. ".." en el Banco Mundial)
 
 def get_data_path():
     return data_path
 
-def load(filename, format="turtle", folder=data_path):
-    g = Graph()
+def load(filename, format="turtle", folder=data_path, use_snapshot=True):
+    """
+    Carga un grafo RDF desde disco.
+    
+    Junto al fichero fuente se mantiene una instantánea binaria (pickle) del grafo ya
+    parseado, identificada por el hash del contenido del fichero. Si el fichero no ha
+    cambiado, el grafo se restaura desde la instantánea y se evita volver a parsear el turtle.
+    
+    :param filename: Nombre del fichero de la ontología
+    :param format: Formato RDF del fichero
+    :param folder: Carpeta en la que se encuentra el fichero
+    :param use_snapshot: Si es False, siempre se parsea el fichero fuente
+    """
     file_path = os.path.join(folder, filename)
+    
+    if not use_snapshot:
+        return _parse(file_path, format)
+    
+    snapshot_key = _snapshot_key(file_path, format)
+    snapshot_path = file_path + snapshot_suffix
+    
+    g = _load_snapshot(snapshot_path, snapshot_key)
+    if g is None:       # No hay instantánea o está desactualizada
+        g = _parse(file_path, format)
+        _save_snapshot(g, snapshot_path, snapshot_key)
+    return g
+
+def _parse(file_path, format):
+    g = Graph()
     g.parse(file_path, format=format)
     return g
 
-def save(graph, filename, format="turtle", folder=data_path):
+def get_file_hash(file_path):
+    """Hash SHA-256 del contenido de un fichero"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _snapshot_key(file_path, format):
+    """
+    Clave de la instantánea: hash del contenido fuente, formato, versión de rdflib y URI del fichero, que es la base
+    con la que se resuelven sus URIs relativas (<pais-AÑO>): si el proyecto se mueve, la instantánea no es válida
+    """
+    return (get_file_hash(file_path), format, rdflib.__version__, pathlib.Path(os.path.abspath(file_path)).as_uri())
+
+def _load_snapshot(snapshot_path, snapshot_key):
+    """Devuelve el grafo de la instantánea, o None si no existe o no corresponde al fichero fuente"""
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "rb") as f:
+            if pickle.load(f) != snapshot_key:     # La cabecera se lee sin deserializar el grafo
+                return None
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Error leyendo instantánea {snapshot_path}: {e}")
+        return None
+
+def _save_snapshot(graph, snapshot_path, snapshot_key):
+    try:
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(snapshot_key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)    # Escritura atómica, por si varios procesos arrancan a la vez
+    except Exception as e:
+        print(f"Error guardando instantánea {snapshot_path}: {e}")
+
+def save(graph, filename, format="turtle", folder=data_path, base=None):
+    """
+    Guarda un grafo RDF en disco.
+    
+    :param graph: Grafo RDF de rdflib
+    :param filename: Nombre del fichero de salida
+    :param format: Formato RDF del fichero
+    :param folder: Carpeta de salida
+    :param base: URI base opcional (p. ej. get_folder_uri de la carpeta de la que se cargó el grafo); las URIs que
+        empiezan por ella se escriben relativas y sin directiva @base, como en la ontología original
+    """
     try:
         if not os.path.exists(folder):
             os.makedirs(folder)
         filepath = os.path.join(folder, filename)
-        graph.serialize(destination=filepath, format=format)
+        if base is None:
+            graph.serialize(destination=filepath, format=format)
+        else:
+            serialized = graph.serialize(format=format, base=base)
+            if serialized.startswith("@base"):     # Sin ella, las URIs relativas se resuelven según la ubicación del fichero
+                serialized = serialized.split("\n", 1)[1]
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(serialized)
         print(f"Ontología guardada en: {filepath}")
     except Exception as e:
         print(f"Error guardando ontología: {e}")
 
+def get_folder_uri(folder):
+    """URI (file://) de una carpeta, con la que rdflib resuelve las URIs relativas de los ficheros que contiene"""
+    return pathlib.Path(os.path.abspath(folder)).as_uri() + "/"
+
+def read_indicator_rows(file_path, format=None, encoding="utf-8"):
+    """
+    Lee, fila a fila y sin cargarlo entero en memoria, un fichero de indicadores CSV o JSON-lines.
+    
+    :param file_path: Ruta del fichero
+    :param format: "csv" o "jsonl" (por defecto, según la extensión del fichero)
+    :param encoding: Codificación del fichero
+    :return: Generador de diccionarios {columna: valor}
+    """
+    if format is None:
+        format = "jsonl" if file_path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    
+    with open(file_path, encoding=encoding, newline="") as f:
+        if format == "csv":
+            yield from csv.DictReader(f)
+        elif format == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise Exception(f"Formato de indicadores no soportado: '{format}' (debe ser 'csv' o 'jsonl').")
+
+def get_country_lookup(graph):
+    """
+    Diccionario para identificar los países de un fichero de indicadores: código de Wikidata, label o
+    código alfa (en minúsculas) -> (código de Wikidata, label del país)
+    """
+    lookup = dict()
+    for country, label in graph.subject_objects(RDFS.label):
+        if not str(country).startswith(str(WD)):
+            continue
+        code = str(country)[len(str(WD)):]
+        lookup[code.lower()] = (code, str(label))
+        lookup[str(label).lower()] = (code, str(label))
+        for alpha_code in graph.objects(country, ONTO.alpha_code):
+            lookup[str(alpha_code).lower()] = (code, str(label))
+    return lookup
+
+def get_subentity_base(graph):
+    """Base de las URIs de las subentidades temporales (<pais-AÑO>) del grafo, o None si no tiene ninguna"""
+    subentity = next(graph.subjects(ONTO.year, None), None)
+    if subentity is None:
+        return None
+    return str(subentity).rsplit("/", 1)[0] + "/"
+
+def iter_indicator_triples(graph, rows, country_column="country", year_column="year", indicator_column="indicator",
+                           value_column="value", base_uri=None, datatypes=None, stats=None):
+    """
+    Convierte filas de indicadores en los triples de las subentidades temporales de la ontología:
+    
+        <pais-AÑO> onto:indicador valor ; onto:year AÑO ; rdfs:subClassOf wd:PAIS .
+    
+    Las filas pueden venir en formato largo (columnas país, año, indicador y valor) o ancho (país, año y
+    una columna por indicador). Los triples se generan uno a uno, sin construir listas intermedias.
+    
+    Si el grafo ya tiene valores de un indicador para ese país y año, se eliminan del grafo antes de generar el
+    nuevo, que los sustituye (en lugar de quedar varios valores para el mismo año).
+    
+    :param graph: Grafo RDF de rdflib con la ontología MCOW (para identificar los países y los tipos de dato)
+    :param rows: Iterable de diccionarios {columna: valor} (p. ej. read_indicator_rows)
+    :param country_column: Columna con el país (código de Wikidata, label o código alfa)
+    :param year_column: Columna con el año
+    :param indicator_column: Columna con el nombre del indicador (solo en formato largo)
+    :param value_column: Columna con el valor (solo en formato largo)
+    :param base_uri: Base de las URIs de las subentidades (por defecto, la de las ya existentes en el grafo)
+    :param datatypes: Diccionario opcional {indicador: tipo XSD}; por defecto se usa el tipo de los valores
+        ya existentes de ese indicador, o XSD.integer / XSD.float según el valor
+    :param stats: Diccionario opcional en el que se van contando filas, triples, valores sustituidos y filas/valores descartados
+    :return: Generador de triples
+    """
+    if stats is None:
+        stats = dict()
+    for counter in ["rows", "triples", "replaced_values", "skipped_rows", "skipped_values"]:
+        stats.setdefault(counter, 0)
+    
+    if base_uri is None:
+        base_uri = get_subentity_base(graph) or "http://www.detalle-pais.es/entity/"
+    
+    countries = get_country_lookup(graph)
+    datatypes = dict(datatypes) if datatypes is not None else dict()
+    integer_pattern = re.compile(r"-?\d+")
+    year_predicate = ONTO.year     # Los términos se crean una sola vez, no por cada triple
+    subclass_predicate = RDFS.subClassOf
+    integer_datatype = XSD.integer
+    indicators = dict()     # Indicador -> (URIRef, tipo de dato)
+    subentities = dict()    # (país, año) -> URIRef de la subentidad
+    checked_values = set()  # (subentidad, predicado) cuyos valores previos ya se han eliminado del grafo
+    country_uris = dict()
+    year_literals = dict()
+    
+    for row in rows:
+        stats["rows"] += 1
+        country = countries.get(str(row.get(country_column, "")).strip().lower())
+        year = str(row.get(year_column, "")).strip()
+        
+        if country is None or not integer_pattern.fullmatch(year):     # País desconocido o año no válido
+            stats["skipped_rows"] += 1
+            continue
+        
+        if indicator_column in row and value_column in row:    # Formato largo
+            values = [(str(row[indicator_column]).strip(), row[value_column])]
+        else:                                                   # Formato ancho
+            values = [(column, value) for column, value in row.items() if column not in (country_column, year_column)]
+        
+        subentity_key = (country[0], year)
+        new_subentity = subentity_key not in subentities
+        if new_subentity:
+            subentities[subentity_key] = URIRef(base_uri + country[1] + "-" + year)
+            if year not in year_literals:
+                year_literals[year] = Literal(int(year))
+            if country[0] not in country_uris:
+                country_uris[country[0]] = WD[country[0]]
+        subentity = subentities[subentity_key]
+        
+        for indicator, value in values:
+            value = str(value).strip() if value is not None else ""
+            if not indicator or value.lower() in indicator_missing_values:
+                continue
+            
+            if indicator not in indicators:
+                predicate = ONTO[indicator]
+                if indicator not in datatypes:     # Mismo tipo que los valores que ya tiene el indicador en el grafo
+                    existing_value = next(graph.objects(None, predicate), None)
+                    datatypes[indicator] = existing_value.datatype if isinstance(existing_value, Literal) else None
+                indicators[indicator] = (predicate, datatypes[indicator])
+            
+            predicate, datatype = indicators[indicator]
+            if datatype is None:
+                datatype = integer_datatype if integer_pattern.fullmatch(value) else XSD.float
+            
+            try:
+                if datatype == integer_datatype:
+                    literal = Literal(int(value))
+                else:
+                    float(value)    # Solo se aceptan valores numéricos
+                    literal = Literal(value, datatype=datatype)
+            except ValueError:
+                stats["skipped_values"] += 1
+                continue
+            
+            if (subentity, predicate) not in checked_values:     # Solo los valores que ya estaban en el grafo
+                checked_values.add((subentity, predicate))
+                previous_values = list(graph.objects(subentity, predicate))
+                for previous_value in previous_values:
+                    graph.remove((subentity, predicate, previous_value))
+                stats["replaced_values"] += len(previous_values)
+            
+            stats["triples"] += 1
+            yield (subentity, predicate, literal)
+        
+        if new_subentity:
+            stats["triples"] += 2
+            yield (subentity, year_predicate, year_literals[year])
+            yield (subentity, subclass_predicate, country_uris[country[0]])
+
+def ingest_indicators(graph, file_path, format=None, batch_size=50000, progress_every=100000, **kwargs):
+    """
+    Añade al grafo, en streaming, los indicadores anuales de un fichero CSV o JSON-lines (ver iter_indicator_triples).
+    
+    El fichero se lee fila a fila y los triples se añaden en lotes de batch_size con graph.addN, por lo que
+    la memoria usada no depende del tamaño del fichero. Cada progress_every filas se informa del avance
+    y del rendimiento (triples por segundo).
+    
+    :param graph: Grafo RDF de rdflib en el que se añaden los triples
+    :param file_path: Ruta del fichero de indicadores
+    :param format: "csv" o "jsonl" (por defecto, según la extensión del fichero)
+    :param batch_size: Número de triples añadidos al grafo de una vez
+    :param progress_every: Cada cuántas filas se informa del avance (None para no informar)
+    :param kwargs: Parámetros de iter_indicator_triples (columnas, base de las URIs, tipos de dato...)
+    :return: Diccionario con las filas leídas, los triples añadidos, los valores sustituidos, las filas/valores descartados y el tiempo empleado
+    """
+    stats = dict()
+    triples = iter_indicator_triples(graph, read_indicator_rows(file_path, format), stats=stats, **kwargs)
+    batch = list()
+    start = time.perf_counter()
+    next_report = progress_every
+    
+    for subject, predicate, value in triples:
+        batch.append((subject, predicate, value, graph))
+        
+        if len(batch) >= batch_size:
+            graph.addN(batch)
+            batch.clear()
+        
+        if next_report is not None and stats["rows"] >= next_report:
+            elapsed = time.perf_counter() - start
+            print(f"{stats['rows']} filas, {stats['triples']} triples ({stats['triples'] / elapsed:.0f} triples/s)")
+            next_report += progress_every
+    
+    graph.addN(batch)
+    
+    stats["seconds"] = time.perf_counter() - start
+    print(f"Ingesta de {file_path} completada: {stats['rows']} filas, {stats['triples']} triples en {stats['seconds']:.2f} s "
+          f"({stats['triples'] / max(stats['seconds'], 1e-9):.0f} triples/s); {stats['replaced_values']} valores sustituidos, {stats['skipped_rows']} filas y "
+          f"{stats['skipped_values']} valores descartados.")
+    return stats
+
 def show_graph(graph, output_file="grafo.html", height="1000px", width="100%", select_menu=True, filter_menu=True, folder="out"):
     """
     Visualiza el grafo RDF usando PyVis.
@@ -191,4 +486,31 @@ def print_matrix(labels, matrix, col_width=30):
         for j, p2 in enumerate(labels):
             label = matrix[i][j]
             print(f"{label:{col_width}} ", end='')
-        print()
\ No newline at end of file
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Herramientas de la ontología MCOW.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    ingest_parser = subparsers.add_parser("ingest", help="Añade a la ontología los indicadores anuales de ficheros CSV o JSON-lines.")
+    ingest_parser.add_argument("files", nargs="+")
+    ingest_parser.add_argument("--folder", default="./impl/data/")
+    ingest_parser.add_argument("--filename", default="country_details_ontology_mejorada.ttl")
+    ingest_parser.add_argument("--output", default=None, help="Fichero de salida (por defecto, se sobrescribe la ontología).")
+    ingest_parser.add_argument("--format", default=None, choices=["csv", "jsonl"])
+    ingest_parser.add_argument("--country-column", default="country")
+    ingest_parser.add_argument("--year-column", default="year")
+    ingest_parser.add_argument("--indicator-column", default="indicator")
+    ingest_parser.add_argument("--value-column", default="value")
+    ingest_parser.add_argument("--batch-size", type=int, default=50000)
+    ingest_parser.add_argument("--progress-every", type=int, default=100000)
+    args = parser.parse_args()
+    
+    if args.command == "ingest":
+        g = load(filename=args.filename, folder=args.folder)
+        for indicators_file in args.files:
+            ingest_indicators(g, indicators_file, format=args.format, batch_size=args.batch_size, progress_every=args.progress_every,
+                              country_column=args.country_column, year_column=args.year_column,
+                              indicator_column=args.indicator_column, value_column=args.value_column)
+        save(g, args.output or args.filename, folder=args.folder, base=get_folder_uri(args.folder))
@@ -3,7 +3,6 @@ from datetime import time
 from impl import mcow_analyser
 from impl import sbc_tools as sbc
 import os
-import torch
 
 st.set_page_config(page_title="MCOW: home", page_icon="./static/images/MCOW.png", layout="wide")
 
@@ -18,8 +17,7 @@ with st.container(horizontal=True, vertical_alignment="center"):
      
 if "mcow_analyser" not in st.session_state:
     with st.spinner("Wait for it...", show_time=True):
-        graph = sbc.load(folder="./impl/data/", format="turtle", filename="country_details_ontology_mejorada.ttl")
-        st.session_state.mcow_analyser = mcow_analyser.MCOWAnalyser(graph)
+        st.session_state.mcow_analyser = mcow_analyser.get_shared_analyser(folder="./impl/data/", format="turtle", filename="country_details_ontology_mejorada.ttl")
 
 alpha_codes_dict = st.session_state.mcow_analyser.get_alpha_codes_dict()
 numerical_attrs_list = st.session_state.mcow_analyser.get_numerical_attributes_list()
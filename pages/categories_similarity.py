@@ -91,6 +91,13 @@ with col1:
                 st.session_state.country_one_name = new_option
                 st.session_state.country_one_wd_code = new_country_wd_code
                 st.session_state.country_one_alpha_code = new_country_alpha_code
+            
+            if "country_one_wd_code" in st.session_state:    # Closest countries to the first one, by category (each one against every country at once)
+                country_names = {v: k for k, v in st.session_state.countries_full_list.items()}
+                
+                for attribute_set, category in [("D", "demographic"), ("E", "economical"), ("S", "social")]:
+                    closest_countries = st.session_state.mcow_analyser.getMostSimilarCountries(st.session_state.country_one_wd_code, attribute_set, 3)
+                    st.caption(f"Closest on {category} terms: " + ", ".join(country_names.get(country, country) for country, _ in closest_countries))
 
         with st.container(horizontal=False):
             if "country_two_name" in st.session_state:
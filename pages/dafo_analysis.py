@@ -8,6 +8,7 @@ with open("assets/style.css") as f:
 
 countries_list = st.session_state.countries_list
 alpha_codes_dict = st.session_state.alpha_codes_dict
+dafo_table = st.session_state.mcow_analyser.getDAFOAnalysisTable()     # Strengths and weaknesses of every country, computed at startup
 
 def on_country_change():
     if st.session_state.country_selector:
@@ -67,7 +68,7 @@ with col1:
                         st.session_state.country_wd_code = new_country_wd_code
                         st.session_state.country_alpha_code = new_country_alpha_code
                         
-            st.session_state.dafo_analysis = st.session_state.mcow_analyser.getDAFOAnalysis(st.session_state.country_wd_code)    
+            st.session_state.dafo_analysis = dafo_table[st.session_state.country_wd_code]
         
         st.space(75)
                 